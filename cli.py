@@ -0,0 +1,570 @@
+"""
+cli.py - Command line entry point of Arknights Auto Separate/Cut Pause
+
+Runs the engine pipelines without a display, for example:
+
+    python cli.py process --mode lazy-keep-valid --input a.mp4 --out a_out --workers 12 --start 10 --end 3600
+    python cli.py queue --mode lazy-keep-valid --input recordings/*.mp4 --out-root done --budget 16 --jobs 2
+    python cli.py watch --mode lazy-keep-valid --inbox /mnt/recordings --jobs 2 --workers 8
+
+Progress is written to stdout as one JSON object per line, the log goes to stderr.
+The exit code is one of the EXIT_* constants below.
+"""
+
+import argparse
+import collections
+import ctypes
+import ctypes.util
+import datetime
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+
+from engine import (
+    JobConfig, run_job, get_job_error, get_video_info, get_frame_rate, detect_margins, read_detection_points,
+    DEFAULT_THREAD_NUM, MAX_THREAD_NUM
+)
+from i18n import t, set_language
+
+logger = logging.getLogger(__name__)
+
+BIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin")
+
+EXIT_OK = 0
+EXIT_FAILED = 1              # the pipeline raised
+EXIT_USAGE = 2               # invalid arguments, also what argparse exits with
+EXIT_INPUT = 3               # input video missing or unreadable, margins not found
+EXIT_NO_FFMPEG = 4
+
+MODES = {                    # in the order of the GUI mode selector
+    "normal-audio-only": 0,
+    "normal-keep-video": 1,
+    "lazy-keep-valid": 2,
+    "lazy-cut-all": 3,
+}
+PROGRESS_STAGES = {          # print_progress start keys
+    "log_thread_analyze_pause_start": "analyze",
+    "log_thread_cut_pause_accel_start": "render",
+    "log_thread_generate_video_start": "render",
+}
+INPUT_ERRORS = ("input_not_found", "input_unreadable")
+DEFAULT_QUEUE_JOBS = 2       # two jobs at a time: one job's merge overlaps the next one's analysis
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".flv", ".avi", ".ts", ".webm")  # inbox files the watcher picks up
+DEFAULT_STABLE_SECONDS = 10  # a file is complete once its size and mtime stay the same this long
+DEFAULT_POLL_SECONDS = 5     # inbox scan interval without inotify
+IN_CREATE = 0x100            # inotify event masks, see inotify(7)
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+JOB_STOP_SECONDS = 5         # grace time of a stopped job's ffmpeg and pool processes before SIGKILL
+
+_event_lock = threading.Lock()
+
+
+def emit_event(stream, event, /, **fields):
+    """Write one JSON progress line"""
+    line = json.dumps(dict(event=event, **fields), ensure_ascii=False)
+    with _event_lock:
+        stream.write(line + "\n")
+        stream.flush()
+
+
+class JsonProgressHandler(logging.Handler):
+    """Turns the progress records of the engine workers into "progress" events"""
+
+    def __init__(self, stream, **fields):
+        super().__init__(logging.INFO)
+        self.stream = stream
+        self.fields = fields  # added to every event, e.g. the job of a queue
+
+    def emit(self, record):
+        progress = getattr(record, "progress", None)
+        if progress is None:
+            return
+        start_key, worker, fraction = progress
+        emit_event(
+            self.stream,
+            "progress",
+            stage=PROGRESS_STAGES.get(start_key, start_key),
+            worker=worker,
+            fraction=round(fraction, 3),
+            **self.fields,
+        )
+
+
+def add_job_arguments(parser, workers=True):
+    """Arguments describing a job, shared by every command that runs one"""
+    parser.add_argument("--mode", required=True, choices=MODES)
+    if workers:
+        parser.add_argument("--workers", type=int, default=DEFAULT_THREAD_NUM, help="threads / processes per stage")
+    parser.add_argument("--start", type=int, default=0, help="frames before this second are kept as is")
+    parser.add_argument("--end", type=int, help="frames after this second are kept as is, default: the whole video")
+    parser.add_argument("--ignore-frames", type=int, default=0, help="drop segments of at most this many frames")
+    parser.add_argument("--margins", type=int, nargs=4, metavar=("TOP", "BOTTOM", "LEFT", "RIGHT"))
+    parser.add_argument("--crop", action="store_true", help="crop the margins off the output")
+    parser.add_argument(
+        "--measure-margin-second", type=float, help="with --crop and no --margins, measure them in this frame"
+    )
+    parser.add_argument("--detection-points", help="detection_points.txt saved by the GUI")
+
+
+def build_job(args, video_path, working_path, thread_num=None, **fields):
+    """
+    Return (job, None) for the job arguments, or (None, (exit code, i18n key)) if the
+    job cannot run. thread_num replaces --workers. Like the GUI, a non-integer frame
+    rate is only warned about, with a "warning" event carrying fields.
+    """
+    if not os.path.isfile(video_path):
+        return None, (EXIT_INPUT, "input_not_found")
+    fps, lgt, hgt, frame_cnt = get_video_info(video_path)
+    if int(fps) <= 0 or frame_cnt <= 0:
+        return None, (EXIT_INPUT, "input_unreadable")
+    frame_rate = get_frame_rate(video_path)
+    if frame_rate.denominator != 1:
+        message = t("fps_warning_cli").format(frame_rate, float(frame_rate))
+        logger.warning(video_path + ": " + message)
+        emit_event(sys.stdout, "warning", message=message, **fields)
+    margins = args.margins or (0, 0, 0, 0)
+    if args.crop and args.margins is None:
+        margins = detect_margins(video_path, args.measure_margin_second)
+        if margins is None:
+            return None, (EXIT_INPUT, "calculation_error")
+    job = JobConfig(
+        video_path=video_path,
+        working_path=working_path,
+        mode=MODES[args.mode],
+        start_second=args.start,
+        # the last whole second that still has a frame
+        end_second=args.end if args.end is not None else int((frame_cnt - 1) / frame_rate),
+        top_margin=margins[0],
+        bottom_margin=margins[1],
+        left_margin=margins[2],
+        right_margin=margins[3],
+        thread_num=thread_num if thread_num is not None else args.workers,
+        ignore_frame_cnt=args.ignore_frames,
+        crop=args.crop,
+        detection_points=read_detection_points(args.detection_points) if args.detection_points else None,
+        frame_rate=frame_rate,
+    )
+    error = get_job_error(job)
+    if error is not None:
+        return None, (EXIT_INPUT if error in INPUT_ERRORS else EXIT_USAGE, error)
+    return job, None
+
+
+def run_job_with_events(job, stream, /, **fields):
+    """Run a job between a "start" and a "done" or "error" event, returns the exit code"""
+    existing = set(os.listdir(job.working_path))
+    emit_event(stream, "start", input=job.video_path, out=job.working_path, mode=job.mode, **fields)
+    start = datetime.datetime.now()
+    try:
+        run_job(job)
+    except Exception as e:
+        logger.exception(job.video_path)
+        emit_event(stream, "error", code=EXIT_FAILED, message=str(e), **fields)
+        return EXIT_FAILED
+    outputs = sorted(set(os.listdir(job.working_path)) - existing)
+    emit_event(
+        stream,
+        "done",
+        outputs=[os.path.join(job.working_path, name) for name in outputs],
+        elapsed=round((datetime.datetime.now() - start).total_seconds(), 3),
+        **fields,
+    )
+    return EXIT_OK
+
+
+def set_log_handlers(quiet, **fields):
+    """Log to stderr and write the progress events to stdout, fields are added to the events"""
+    log_handler = logging.StreamHandler(sys.stderr)
+    log_handler.setLevel(logging.WARNING if quiet else logging.INFO)
+    logging.basicConfig(
+        level=logging.INFO, format="%(message)s", handlers=[log_handler, JsonProgressHandler(sys.stdout, **fields)],
+        force=True
+    )
+
+
+def process(args):
+    video_path = os.path.abspath(args.input)
+    # a folder next to the input named after it, never the folder of other recordings
+    working_path = os.path.abspath(args.out or os.path.splitext(args.input)[0])
+    os.makedirs(working_path, exist_ok=True)
+    job, error = build_job(args, video_path, working_path)
+    if error is not None:
+        code, key = error
+        logger.error(t(key))
+        emit_event(sys.stdout, "error", code=code, message=t(key))
+        return code
+    return run_job_with_events(job, sys.stdout)
+
+
+def get_out_path(video_path, out_root):
+    """A folder named after the input, in out_root or next to the input"""
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.abspath(os.path.join(out_root or os.path.dirname(video_path), name))
+
+
+def run_queued_job(job, job_idx, language, quiet):
+    """Process target of one queue job, also runs in spawned processes where nothing is set up"""
+    # own session: the job's ffmpeg and pool processes join its process group, so stop_jobs reaches them too
+    if hasattr(os, "setsid"):
+        os.setsid()
+    # the watcher stops on SIGTERM by terminating its jobs
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    set_language(language, notify=False)
+    set_log_handlers(quiet, job=job_idx)
+    sys.exit(run_job_with_events(job, sys.stdout, job=job_idx))
+
+
+def kill_job_group(process_t, signum):
+    """Send signum to the process group of a job, False if there is none"""
+    if not hasattr(os, "killpg"):
+        return False
+    try:
+        os.killpg(process_t.pid, signum)
+    except (ProcessLookupError, PermissionError):  # exited, or not yet in its own session
+        return False
+    return True
+
+
+def stop_jobs(processes):
+    """
+    Stop jobs with everything they started
+
+    SIGTERM goes to the whole process group of each job, SIGKILL to what is still there
+    after JOB_STOP_SECONDS. Without process groups (Windows) only the job processes are stopped.
+    """
+    for process_t in processes:
+        if not kill_job_group(process_t, signal.SIGTERM):
+            process_t.terminate()
+    deadline = time.monotonic() + JOB_STOP_SECONDS
+    for process_t in processes:
+        process_t.join(max(0, deadline - time.monotonic()))
+        # what is left of the group, also children of a job that already exited
+        if not kill_job_group(process_t, signal.SIGKILL) and process_t.is_alive():
+            process_t.kill()
+        process_t.join()
+
+
+def get_worker_share(budget, jobs, running, pending_cnt):
+    """
+    Workers of the next job: the free part of the budget split between the free job
+    slots that can still be filled, so the last jobs of a queue get the whole budget
+    """
+    slots = min(jobs, len(running) + pending_cnt) - len(running)
+    free = budget - sum(workers for _, workers in running.values())
+    return max(1, min(MAX_THREAD_NUM, free // slots))
+
+
+def queue(args):
+    """
+    Run every input under one worker budget, at most --jobs at a time
+
+    Each job runs in its own process with its own output folder. A job gets its share
+    of the budget when it starts, the events it writes carry its index in the "job"
+    field. A "queue" event with the status of every job ends the output.
+    """
+    budget = args.budget or os.cpu_count() or DEFAULT_THREAD_NUM
+    jobs = max(1, min(args.jobs, budget))
+    status = []
+    pending = collections.deque()
+    for job_idx, path in enumerate(args.input):
+        video_path = os.path.abspath(path)
+        working_path = get_out_path(video_path, args.out_root)
+        os.makedirs(working_path, exist_ok=True)
+        status.append({"job": job_idx, "input": video_path, "out": working_path, "status": "queued", "code": None})
+        job, error = build_job(args, video_path, working_path, thread_num=1, job=job_idx)
+        if error is not None:
+            code, key = error
+            logger.error(video_path + ": " + t(key))
+            emit_event(sys.stdout, "error", code=code, message=t(key), job=job_idx)
+            status[job_idx].update(status="failed", code=code)
+            continue
+        emit_event(sys.stdout, "queued", input=video_path, out=working_path, job=job_idx)
+        pending.append((job_idx, job))
+
+    running = {}  # job index -> (process, workers)
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                workers = get_worker_share(budget, jobs, running, len(pending))
+                job_idx, job = pending.popleft()
+                process_t = multiprocessing.Process(
+                    target=run_queued_job, args=(job._replace(thread_num=workers), job_idx, args.language, args.quiet)
+                )
+                process_t.start()
+                running[job_idx] = (process_t, workers)
+                status[job_idx]["status"] = "running"
+            multiprocessing.connection.wait([process_t.sentinel for process_t, _ in running.values()])
+            for job_idx, (process_t, _) in list(running.items()):
+                if process_t.is_alive():
+                    continue
+                process_t.join()
+                del running[job_idx]
+                code = process_t.exitcode
+                if code < 0:
+                    # killed before it could write its own error event, its ffmpeg may still run
+                    kill_job_group(process_t, signal.SIGKILL)
+                    emit_event(sys.stdout, "error", code=EXIT_FAILED, message="signal " + str(-code), job=job_idx)
+                    code = EXIT_FAILED
+                status[job_idx].update(status="done" if code == EXIT_OK else "failed", code=code)
+    finally:
+        stop_jobs([process_t for process_t, _ in running.values()])
+    emit_event(sys.stdout, "queue", jobs=status)
+    return EXIT_OK if all(job_status["code"] == EXIT_OK for job_status in status) else EXIT_FAILED
+
+
+class InotifyWatcher:
+    """
+    inotify on a folder through libc, only used to wake up the watcher: the folder is
+    rescanned after any event, so the events themselves are not parsed
+    """
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        # no IN_MODIFY, a file being copied would wake the watcher on every write
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch")
+
+    def fileno(self):
+        return self.fd
+
+    def drain(self):
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def get_inotify_watcher(path, poll):
+    """An InotifyWatcher, or None to poll: off Linux, with --poll or if inotify fails"""
+    if poll or not sys.platform.startswith("linux"):
+        return None
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError) as e:
+        logger.debug(e)
+        return None
+
+
+class StableFiles:
+    """Inbox video files whose size and mtime have not changed for stable_seconds"""
+
+    def __init__(self, inbox, stable_seconds):
+        self.inbox = inbox
+        self.stable_seconds = stable_seconds
+        self.seen = {}  # path -> (size, mtime_ns, monotonic time it was first seen like this)
+
+    def scan(self, skip):
+        """Return the stable files not in skip, in the order they became stable"""
+        now = time.monotonic()
+        seen = {}
+        for entry in os.scandir(self.inbox):
+            if not entry.is_file() or not entry.name.lower().endswith(VIDEO_EXTENSIONS) or entry.path in skip:
+                continue
+            stat = entry.stat()
+            size, mtime, since = self.seen.get(entry.path, (None, None, now))
+            if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+                since = now
+            seen[entry.path] = (stat.st_size, stat.st_mtime_ns, since)
+        self.seen = seen
+        return sorted(
+            (path for path, (size, _, since) in seen.items() if size > 0 and now - since >= self.stable_seconds),
+            key=lambda path: seen[path][2]
+        )
+
+    def settling(self, skip):
+        """Whether a file not in skip still has to be checked again before it is stable"""
+        return any(path not in skip for path in self.seen)
+
+
+def get_free_path(folder, name):
+    """folder/name, with a number appended if that is taken"""
+    path = os.path.join(folder, name)
+    root, ext = os.path.splitext(path)
+    cnt = 1
+    while os.path.exists(path):
+        path = root + "_" + str(cnt) + ext
+        cnt += 1
+    return path
+
+
+def move_job(video_path, working_path, dest_root):
+    """Move the source into the job's output folder and the folder into dest_root, returns where it went"""
+    shutil.move(video_path, get_free_path(working_path, os.path.basename(video_path)))
+    dest = get_free_path(dest_root, os.path.basename(working_path))
+    shutil.move(working_path, dest)
+    return dest
+
+
+def watch(args):
+    """
+    Process the recordings landing in --inbox until stopped, at most --jobs at a time
+
+    A file is picked up once it has been stable for --stable-seconds. Its job runs in
+    --work-dir, then the folder with the outputs and the source is moved to --done-dir
+    or --failed-dir. Files still in the inbox when the watcher is stopped are picked up
+    again the next time, in the same work folder.
+    """
+    inbox = os.path.abspath(args.inbox)
+    work_dir = os.path.abspath(args.work_dir or os.path.join(inbox, "processing"))
+    done_dir = os.path.abspath(args.done_dir or os.path.join(inbox, "done"))
+    failed_dir = os.path.abspath(args.failed_dir or os.path.join(inbox, "failed"))
+    for folder in (work_dir, done_dir, failed_dir):
+        os.makedirs(folder, exist_ok=True)
+    watcher = get_inotify_watcher(inbox, args.poll)
+    if watcher is None and not args.poll:
+        logger.warning(t("log_watch_polling_fallback").format(args.poll_seconds))
+    logger.info(t("log_watch_started").format(inbox, "inotify" if watcher is not None else "polling"))
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(EXIT_OK))
+
+    stable_files = StableFiles(inbox, args.stable_seconds)
+    running = {}  # job index -> (process, video path, working path)
+    job_cnt = 0
+    try:
+        while True:
+            for job_idx, (process_t, video_path, working_path) in list(running.items()):
+                if process_t.is_alive():
+                    continue
+                process_t.join()
+                del running[job_idx]
+                if process_t.exitcode < 0:
+                    kill_job_group(process_t, signal.SIGKILL)
+                    emit_event(
+                        sys.stdout, "error", code=EXIT_FAILED, message="signal " + str(-process_t.exitcode), job=job_idx
+                    )
+                done = process_t.exitcode == EXIT_OK
+                dest = move_job(video_path, working_path, done_dir if done else failed_dir)
+                logger.info(t("log_watch_job_done" if done else "log_watch_job_failed").format(video_path, dest))
+                emit_event(sys.stdout, "moved", status="done" if done else "failed", dest=dest, job=job_idx)
+
+            active = {video_path for _, video_path, _ in running.values()}
+            for video_path in stable_files.scan(active):
+                if len(running) >= args.jobs:
+                    break
+                job_idx = job_cnt
+                job_cnt += 1
+                name = os.path.splitext(os.path.basename(video_path))[0]
+                working_path = os.path.join(work_dir, name)
+                if working_path in {path for _, _, path in running.values()}:  # a.mp4 and a.mkv
+                    working_path = get_free_path(work_dir, name)
+                os.makedirs(working_path, exist_ok=True)
+                emit_event(sys.stdout, "queued", input=video_path, out=working_path, job=job_idx)
+                job, error = build_job(args, video_path, working_path, job=job_idx)
+                if error is not None:
+                    code, key = error
+                    logger.error(video_path + ": " + t(key))
+                    emit_event(sys.stdout, "error", code=code, message=t(key), job=job_idx)
+                    dest = move_job(video_path, working_path, failed_dir)
+                    logger.info(t("log_watch_job_failed").format(video_path, dest))
+                    emit_event(sys.stdout, "moved", status="failed", dest=dest, job=job_idx)
+                    continue
+                process_t = multiprocessing.Process(
+                    target=run_queued_job, args=(job, job_idx, args.language, args.quiet)
+                )
+                process_t.start()
+                running[job_idx] = (process_t, video_path, working_path)
+
+            # wake up on a finished job, an inotify event, or when a file may have become stable
+            active = {video_path for _, video_path, _ in running.values()}
+            timeout = args.poll_seconds
+            if watcher is not None:
+                timeout = args.stable_seconds if stable_files.settling(active) else None
+            ready = multiprocessing.connection.wait(
+                [process_t.sentinel for process_t, _, _ in running.values()] + ([watcher] if watcher else []),
+                timeout
+            )
+            if watcher is not None and watcher in ready:
+                watcher.drain()
+    finally:
+        stop_jobs([process_t for process_t, _, _ in running.values()])
+        if watcher is not None:
+            watcher.close()
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Arknights Auto Separate/Cut Pause, headless")
+    parser.add_argument("--language", choices=("cn", "en", "ja"), default="en", help="language of the log")
+    parser.add_argument("--quiet", action="store_true", help="only write the JSON progress, no log")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    process_parser = commands.add_parser("process", help="process one recording")
+    process_parser.add_argument("--input", required=True)
+    process_parser.add_argument("--out", help="output folder, default: a folder named after the input next to it")
+    add_job_arguments(process_parser)
+    process_parser.set_defaults(func=process)
+
+    queue_parser = commands.add_parser("queue", help="process many recordings under one worker budget")
+    queue_parser.add_argument("--input", required=True, nargs="+")
+    queue_parser.add_argument(
+        "--out-root", help="one output folder per input named after it in this folder, default: next to the input"
+    )
+    queue_parser.add_argument("--budget", type=int, help="workers shared by all running jobs, default: the CPU count")
+    queue_parser.add_argument(
+        "--jobs", type=int, default=DEFAULT_QUEUE_JOBS, help="jobs running at the same time, at most --budget"
+    )
+    add_job_arguments(queue_parser, workers=False)
+    queue_parser.set_defaults(func=queue)
+
+    watch_parser = commands.add_parser("watch", help="process the recordings landing in a folder until stopped")
+    watch_parser.add_argument("--inbox", required=True)
+    watch_parser.add_argument("--work-dir", help="where jobs run, default: INBOX/processing")
+    watch_parser.add_argument("--done-dir", help="outputs and sources of finished jobs, default: INBOX/done")
+    watch_parser.add_argument("--failed-dir", help="outputs and sources of failed jobs, default: INBOX/failed")
+    watch_parser.add_argument("--jobs", type=int, default=DEFAULT_QUEUE_JOBS, help="jobs running at the same time")
+    watch_parser.add_argument("--stable-seconds", type=float, default=DEFAULT_STABLE_SECONDS)
+    watch_parser.add_argument(
+        "--poll", action="store_true", help="scan instead of inotify, needed for folders written over the network"
+    )
+    watch_parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS)
+    add_job_arguments(watch_parser)
+    watch_parser.set_defaults(func=watch)
+    return parser
+
+
+def check_job_arguments(parser, args):
+    if args.crop and args.margins is None and args.measure_margin_second is None:
+        parser.error("--crop needs --margins or --measure-margin-second")
+    if args.command == "queue":
+        if args.jobs < 1 or (args.budget is not None and args.budget < 1):
+            parser.error("--jobs and --budget must be at least 1")
+        out_paths = [get_out_path(os.path.abspath(path), args.out_root) for path in args.input]
+        if len(set(map(os.path.normcase, out_paths))) < len(out_paths):
+            parser.error("every input needs its own output folder, inputs with the same name cannot share --out-root")
+    if args.command == "watch" and (args.jobs < 1 or args.stable_seconds < 0 or args.poll_seconds <= 0):
+        parser.error("--jobs and --poll-seconds must be positive, --stable-seconds at least 0")
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    check_job_arguments(parser, args)
+    set_language(args.language, notify=False)
+    set_log_handlers(args.quiet)
+    # FFmpeg downloaded by setup.bat, like the GUI
+    os.environ["PATH"] = BIN_PATH + os.pathsep + os.environ.get("PATH", "")
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        logger.error(t("ffmpeg_not_found"))
+        emit_event(sys.stdout, "error", code=EXIT_NO_FFMPEG, message=t("ffmpeg_not_found"))
+        return EXIT_NO_FFMPEG
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
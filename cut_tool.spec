@@ -56,6 +56,7 @@ a = Analysis(
         # Internationalization modules
         'i18n',
         'ui',
+        'engine',
         # ffmpegcv for H.264 encoding
         'ffmpegcv',
         'ffmpegcv.ffmpeg_writer',
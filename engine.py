@@ -0,0 +1,2747 @@
+"""
+engine.py - Headless processing pipeline of Arknights Auto Separate/Cut Pause
+
+This module provides:
+- The pause analysis (detection points, frame classification, analysis cache)
+- The normal and lazy mode renders
+- Margin detection and cropping
+- JobConfig and run_job, the entry point of one processing run
+
+Nothing here touches Tk. Everything a run needs is passed in a JobConfig, so jobs
+can be run from worker threads and processes and without a display.
+"""
+
+import os
+import cv2
+import numpy as np
+from pydub import AudioSegment
+import subprocess
+import datetime
+import threading
+import logging
+import logging.handlers
+import hashlib
+import collections
+import multiprocessing
+import queue
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+from i18n import t, get_current_language, set_language
+
+logger = logging.getLogger(__name__)
+
+analysis_cache_path = os.path.join(os.getcwd(), "analysis_cache")
+
+# Video metadata cache for performance optimization
+_video_metadata_cache = {}
+_keyframe_cache = {}
+_frame_rate_cache = {}
+
+# Constants
+TEMP_FILENAME = "temp_list.txt"
+TEMP_PREFIX = "out_"
+FOURCC = cv2.VideoWriter_fourcc("m", "p", "4", "v")
+DEFAULT_THREAD_NUM = 4
+MAX_THREAD_NUM = 16          # the GUI accepts 1 to 16 threads
+SHOW_PROGRESS_SEG = 5
+
+P_M_Y_CO = 0.074             #(right top) pause middle coefficient
+P_M_X_CO = 0.112
+P_L_X_CO = 0.125
+M_P_M_Y_2_CO = 0.5           #this is the black point, other 3 are white point 
+M_P_M_X_2_CO = 0.5           
+M_P_L_Y_CO = 0.007           #middle pause
+M_P_L_X_CO = 0.19
+M_P_M_Y_CO = 0.043
+M_P_R_Y_CO = 0.023
+M_P_R_X_CO = 0.149
+
+ACC_L_Y_CO = 0.095           #accelerate for lazy only
+ACC_L_X_CO = 0.262
+ACC_R_X_CO = 0.247
+
+VP_Y_CO = 0.5       #valid pause
+VP_X_1_CO = 0.046
+VP_X_2_CO = 0.093
+VP_X_3_CO = 0.139
+VP_X_4_CO = 0.185
+VP_ROW_OFFSETS = (0, -1, 1)  # valid pause row is checked with these y offsets
+
+# Disabled following as new UI always works with first way of checking
+#VP_2_Y_CO = 0.389   #second option to check valid pause
+#VP_2_X_1_CO = 0.188 #wendi
+#VP_2_X_2_CO = 0.197 #niaolong(mozu)
+#VP_2_X_3_CO = 0.206 #m3
+#VP_2_X_4_CO = 0.217 #panxie
+
+WHITE_10 = np.array([240, 240, 240])
+WHITE_9 = np.array([200, 200, 200])  # the number indicates the white level
+GRAY = np.array([128, 128, 128])
+BLACK_9 = np.array([30, 30, 30])
+P_DIFF_TH = 10 # threshold
+M_P_DIFF_TH = np.array([30, 30, 30]) # threshold
+GRAY_LOWER = np.array([55, 55, 55])
+GRAY_UPPER = np.array([130, 130, 130])
+
+BLUE = 0
+GREEN = 1
+RED = 2
+DARK_RED_TH = [20, 20, 90] # BGR <= <= >=
+RED_RATIO_FOR_TOP_MARGIN = 0.3913
+BLUE_TH = [130, 110, 50] # >= >= <=
+BLUE_LOWER_PERC = 0.1
+BLUE_UPPER_PERC = 0.25
+LIGHT_GRAY_TH = [130, 130, 130]
+LIGHT_GRAY_LOWER_PERC = 0.1
+LIGHT_GRAY_UPPER_PERC = 0.25
+
+
+MARGIN_TH = 500
+
+# Probe layout of the batch classifier (see get_probe_points)
+PROBE_P_L = 0
+PROBE_P_M = 1
+PROBE_M_P_L = 2
+PROBE_M_P_M = 3
+PROBE_M_P_R = 4
+PROBE_M_P_M_2 = 5
+PROBE_ACC_R = 6
+PROBE_ACC_L = 7
+PROBE_VP = 8                 # 3 rows (VP_ROW_OFFSETS) x 4 points from here on
+PROBE_CNT = PROBE_VP + 3 * 4
+# Frame label bits of PauseTimeline
+PAUSE_BIT = 1
+VALID_PAUSE_BIT = 2
+KEEP_BIT = 4
+ANALYSIS_BATCH_SIZE = 256    # frames classified per NumPy call
+ANALYSIS_INPUT = "strip"     # "strip": ffmpeg streams only the probe pixels, "capture": OpenCV decodes full frames
+PROBE_TILE_SIZE = 2          # side of the tile cut around each probe pixel in strip mode
+ANALYSIS_STRIDE = 1          # >1 samples every Nth frame and bisects between samples that disagree
+COARSE_MAX_GAP = 30          # upper bound of ANALYSIS_STRIDE, shorter runs may be missed by the coarse search
+COARSE_VERIFY_RADIUS = 3     # frames checked on each side of every transition the coarse search finds
+COARSE_SEEK_FRAMES = 120     # read forward instead of seeking when the next sample is at most this far
+SEEK_COST_FRAMES = 10        # FrameSource cost model, a seek costs this many frames on top of decoding from the keyframe
+ANALYSIS_BACKEND = "process" # "process": one spawned worker process per range, "thread": threads sharing the GIL
+ANALYSIS_SETTING_NAMES = (   # module settings the analysis result depends on, part of the cache key
+    "PROBE_TILE_SIZE", "ANALYSIS_STRIDE", "COARSE_MAX_GAP", "COARSE_VERIFY_RADIUS",
+    "P_DIFF_TH", "M_P_DIFF_TH", "WHITE_10", "WHITE_9", "GRAY", "GRAY_LOWER", "GRAY_UPPER", "VP_ROW_OFFSETS",
+)
+ANALYSIS_WORKER_SETTING_NAMES = ANALYSIS_SETTING_NAMES + ("ANALYSIS_INPUT",)  # sent to spawned workers, the input gives the same flags
+ANALYSIS_CACHE = True        # reuse the analysis of an unchanged video with unchanged detection settings
+ANALYSIS_CACHE_VERSION = 4   # bump when the analysis output changes
+ANALYSIS_CACHE_HASH_BYTES = 4 * 1024 * 1024  # hashed from both ends of the video for its fingerprint
+LAZY_STREAMING = False       # analyse and write lazy mode in a single decode (not with short runs removed or a cached analysis), slower than two passes unless decoding dominates
+LAZY_STREAM_MAX_PENDING_MB = 2048  # frames of undecided pause runs held in memory, beyond this fall back to two passes
+LAZY_RENDER = "filter"       # lazy mode output, "filter": one ffmpeg filter graph render with audio, "frames": kept frames written per worker
+RENDER_BACKEND = "smart"     # normal mode segments, "smart": copy whole GOPs with ffmpeg, "opencv": decode and re-encode with the frame writer
+SMART_RENDER_ENCODERS = {"h264": "libx264", "hevc": "libx265"}  # re-encoders for the boundary GOPs
+SMART_RENDER_FALLBACK_ENCODER = "libx264"  # for sources without an entry above, which are re-encoded entirely
+SMART_RENDER_PROFILES = {    # ffprobe profile names of the source, as the -profile:v of the boundary re-encode
+    "libx264": {
+        "Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high", "High 10": "high10",
+        "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444",
+    },
+    "libx265": {"Main": "main", "Main 10": "main10", "Main Still Picture": "mainstillpicture"},
+}
+SMART_RENDER_PRESET = "veryfast"
+SMART_RENDER_CRF = 18
+AUDIO_BACKEND = "ffmpeg"     # normal mode audio segments, "ffmpeg": cut from the video per segment, "pydub": slice the decoded soundtrack in memory
+AUDIO_STREAM_COPY = True     # "ffmpeg" audio, AAC sources are cut without re-encoding, other codecs are encoded once to AAC
+CROP_BACKEND = "chunked"     # aftercrop.mp4, "chunked": keyframe aligned chunks encoded by parallel ffmpeg processes, "single": one ffmpeg process
+CROP_ENCODER = "libx264"
+CROP_PRESET = "medium"       # the ffmpeg default the single process crop has always used
+CROP_CRF = 23
+MUX_BATCH_SIZE = 32          # segments merged by one ffmpeg process
+NORMAL_PIPELINE = True       # "ffmpeg" audio, cut the audio of and merge each segment as soon as its video is written
+PIPELINE_QUEUE_SIZE = 64     # segments waiting between two pipeline stages
+WRITER_BACKEND = "ffmpeg"    # frames written from Python, "ffmpeg": one piped encoder process per worker, "opencv": cv2.VideoWriter with FOURCC
+WRITER_ENCODER = "libx264"
+WRITER_PRESET = "veryfast"
+WRITER_CRF = 23
+WRITER_MAX_SEGMENTS = 500    # segments per encoder process, bounds the length of its command line
+
+class JobConfig(NamedTuple):
+    """
+    Everything one processing run needs, handed to run_job
+
+    A tuple, so a job cannot change under the workers running it and can be sent to
+    another process as is. working_path is the folder the segments or output.mp4 are
+    written to. detection_points are the manually set (array_1, array_2) points as
+    [y, x] pairs, None computes them from the margins. frame_rate is the exact rate
+    every frame index is converted to a time with, None reads it with get_frame_rate.
+    """
+    video_path: str
+    working_path: str
+    mode: int                    # 0, 1: normal mode, 2, 3: lazy mode, in the order of the mode selector
+    start_second: int            # frames before start_second and after end_second are kept as is
+    end_second: int
+    top_margin: int = 0
+    bottom_margin: int = 0
+    left_margin: int = 0
+    right_margin: int = 0
+    thread_num: int = DEFAULT_THREAD_NUM
+    ignore_frame_cnt: int = 0
+    crop: bool = False           # crop the margins off in the final encode
+    detection_points: Optional[Tuple[tuple, tuple]] = None
+    frame_rate: Optional[Fraction] = None
+
+def get_video_info(video_path, use_cache=True):
+    if use_cache and video_path in _video_metadata_cache:
+        return _video_metadata_cache[video_path]
+    cap = cv2.VideoCapture(video_path)
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    lgt = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    hgt = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_cnt = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    result = (fps, lgt, hgt, frame_cnt)
+    if use_cache:
+        _video_metadata_cache[video_path] = result
+    return result
+
+def get_frame_rate(video_path):
+    """
+    Exact frame rate of the first video stream as a Fraction, e.g. 30000/1001
+
+    get_video_info rounds the rate down to an int, which is only right for integer rate
+    sources, so every conversion between frame indices and ffmpeg timestamps uses this.
+    r_frame_rate is taken unless it is more than 1% off avg_frame_rate (field rates,
+    variable frame rates). Falls back to the OpenCV rate if ffprobe is not available.
+    """
+    if video_path in _frame_rate_cache:
+        return _frame_rate_cache[video_path]
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet", "-select_streams", "v:0",
+                "-show_entries", "stream=r_frame_rate,avg_frame_rate", "-of", "csv=p=0", video_path,
+            ],
+            capture_output=True,
+            text=True,
+        ).stdout
+    except OSError:
+        output = ""
+    rates = []
+    for field in output.strip().split(","):
+        num, _, den = field.partition("/")
+        if num.isdigit() and den.isdigit() and int(num) > 0 and int(den) > 0:
+            rates.append(Fraction(int(num), int(den)))
+    if len(rates) == 2 and abs(rates[0] - rates[1]) > rates[1] / 100:
+        frame_rate = rates[1]
+    elif rates:
+        frame_rate = rates[0]
+    else:
+        cap = cv2.VideoCapture(video_path)
+        frame_rate = Fraction(cap.get(cv2.CAP_PROP_FPS)).limit_denominator(1001)
+        cap.release()
+    _frame_rate_cache[video_path] = frame_rate
+    return frame_rate
+
+def frame_seconds(frame, frame_rate):
+    """ffmpeg time argument of a (possibly fractional) frame position at the exact frame_rate"""
+    return f"{float(frame / frame_rate):.6f}"
+
+def get_frame_cnt(video_path, use_cache=True):
+    if use_cache and video_path in _video_metadata_cache:
+        return _video_metadata_cache[video_path][3]  # Return frame_cnt
+    cap = cv2.VideoCapture(video_path)
+    frame_cnt = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if use_cache:
+        # Cache just the frame count if full metadata not cached
+        if video_path in _video_metadata_cache:
+            _video_metadata_cache[video_path] = (
+                _video_metadata_cache[video_path][0],
+                _video_metadata_cache[video_path][1],
+                _video_metadata_cache[video_path][2],
+                frame_cnt
+            )
+        else:
+            _video_metadata_cache[video_path] = (0, 0, 0, frame_cnt)
+    return frame_cnt
+
+def get_keyframes(video_path, frame_rate):
+    """
+    Return the sorted frame indices of the video keyframes, read from the packet flags
+    without decoding and converted at the exact frame_rate. Returns an empty array if
+    ffprobe is not available.
+    """
+    if video_path in _keyframe_cache:
+        return _keyframe_cache[video_path]
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet", "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path,
+            ],
+            capture_output=True,
+            text=True,
+        ).stdout
+    except OSError:
+        output = ""
+    pts_times = []
+    key_times = []
+    for line in output.splitlines():
+        fields = line.split(",")
+        if len(fields) < 2 or fields[0] in ("", "N/A"):
+            continue
+        pts_times.append(float(fields[0]))
+        if "K" in fields[1]:
+            key_times.append(float(fields[0]))
+    if pts_times:
+        first_pts = min(pts_times)
+        keyframes = np.unique(np.round((np.array(key_times) - first_pts) * float(frame_rate)).astype(np.int64))
+    else:
+        keyframes = np.array([], dtype=np.int64)
+    _keyframe_cache[video_path] = keyframes
+    return keyframes
+
+def get_video_codec(video_path):
+    """
+    Return (codec_name, pix_fmt, profile, level, time_base) of the first video stream, or
+    None if ffprobe is not available. level is 0 and time_base "" when unknown.
+    """
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet", "-select_streams", "v:0",
+                "-show_entries", "stream=codec_name,pix_fmt,profile,level,time_base",
+                "-of", "default=noprint_wrappers=1", video_path,
+            ],
+            capture_output=True,
+            text=True,
+        ).stdout
+    except OSError:
+        return None
+    fields = dict(line.partition("=")[::2] for line in output.splitlines())
+    if not fields.get("codec_name") or not fields.get("pix_fmt"):
+        return None
+    level = fields.get("level", "")
+    return (
+        fields["codec_name"],
+        fields["pix_fmt"],
+        fields.get("profile", ""),
+        int(level) if level.isdigit() else 0,
+        fields.get("time_base", ""),
+    )
+
+def partition_frames(first, last, parts, keyframes=None):
+    """
+    Split frames first..last (inclusive) into at most parts balanced (start, end) ranges
+
+    The ranges cover every frame exactly once. When keyframes are given, each inner
+    boundary moves to the nearest keyframe within a quarter of a range, so every
+    worker starts decoding right at a keyframe.
+    """
+    n = last - first + 1
+    if n <= 0:
+        return []
+    parts = max(1, min(parts, n))
+    starts = [first + round(k * n / parts) for k in range(parts)]
+    if keyframes is not None and len(keyframes) > 0:
+        tolerance = n / parts / 4
+        for k in range(1, parts):
+            idx = np.searchsorted(keyframes, starts[k])
+            nearby = keyframes[max(0, idx - 1):idx + 1]
+            nearest = nearby[np.argmin(np.abs(nearby - starts[k]))]
+            if abs(nearest - starts[k]) <= tolerance:
+                starts[k] = int(nearest)
+    starts = sorted(set(starts))
+    return [(start, end - 1) for start, end in zip(starts, starts[1:] + [last + 1])]
+
+def clear_video_cache():
+    """Clear the video metadata cache. Call when video files are modified/deleted."""
+    global _video_metadata_cache
+    _video_metadata_cache.clear()
+    _keyframe_cache.clear()
+    _frame_rate_cache.clear()
+
+def detect_margins(video_path, measure_margin_second):
+    """
+    Measure the margins around the game in the frame at measure_margin_second
+
+    Returns (top_margin, bottom_margin, left_margin, right_margin), or None if they
+    could not be found.
+    """
+    fps, lgt, hgt, frame_cnt = get_video_info(video_path)
+    cap = cv2.VideoCapture(video_path)
+    top_margin = MARGIN_TH
+    bottom_margin = MARGIN_TH
+    left_margin = MARGIN_TH
+    right_margin = MARGIN_TH
+
+    cap.set(
+        cv2.CAP_PROP_POS_FRAMES, int(fps * measure_margin_second)
+    )
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        return None
+
+    flag = False
+    red_cnt = 1
+    # Vectorized right margin and top margin detection (red vertical line)
+    # Only check the right half of the frame, up to half height
+    right_half = frame[:int(hgt/2), int(lgt/2):]
+    red_mask = (
+        (right_half[:, :, RED] >= DARK_RED_TH[RED]) &
+        (right_half[:, :, BLUE] <= DARK_RED_TH[BLUE]) &
+        (right_half[:, :, GREEN] <= DARK_RED_TH[GREEN])
+    )
+    # Find rightmost column with red pixels
+    red_columns = np.any(red_mask, axis=0)
+    if np.any(red_columns):
+        # Get index of rightmost red column (from right side)
+        rightmost_red_idx = len(red_columns) - 1 - np.argmax(red_columns[::-1])
+        right_margin = int(lgt/2) - rightmost_red_idx - 1
+        # Find top red pixel position for top margin calculation
+        red_col_mask = red_mask[:, rightmost_red_idx]
+        red_indices = np.where(red_col_mask)[0]
+        if len(red_indices) > 0:
+            first_y = red_indices[0]
+            # Count consecutive red pixels from first_y
+            red_cnt = 1
+            for idx in range(1, len(red_indices)):
+                if red_indices[idx] == red_indices[idx-1] + 1:
+                    red_cnt += 1
+                else:
+                    break
+            top_margin = int(first_y - red_cnt * RED_RATIO_FOR_TOP_MARGIN)
+        else:
+            top_margin = MARGIN_TH
+    else:
+        top_margin = MARGIN_TH
+        right_margin = MARGIN_TH
+        flag = True  # No red found, skip to next check
+
+    if not flag:
+        # Vectorized bottom margin detection (blue horizontal line)
+        # Check bottom half of frame
+        bottom_half = frame[int(hgt/2):, :]
+        blue_mask = (
+            (bottom_half[:, :, BLUE] >= BLUE_TH[BLUE]) &
+            (bottom_half[:, :, GREEN] >= BLUE_TH[GREEN]) &
+            (bottom_half[:, :, RED] <= BLUE_TH[RED])
+        )
+        blue_row_counts = np.sum(blue_mask, axis=1)
+        bottom_margin = MARGIN_TH
+        for bot_check in range(1, min(int(hgt / 2), len(blue_row_counts))):
+            row_idx = len(blue_row_counts) - bot_check
+            blue_cnt = blue_row_counts[row_idx]
+            if BLUE_LOWER_PERC < blue_cnt / lgt < BLUE_UPPER_PERC:
+                bottom_margin = bot_check - 1
+                break
+
+        # Vectorized left margin detection (light gray vertical area)
+        left_half = frame[:, :int(lgt/2)]
+        gray_mask = (
+            (left_half[:, :, BLUE] >= LIGHT_GRAY_TH[BLUE]) &
+            (left_half[:, :, GREEN] >= LIGHT_GRAY_TH[GREEN]) &
+            (left_half[:, :, RED] >= LIGHT_GRAY_TH[RED])
+        )
+        gray_column_ratios = np.sum(gray_mask, axis=0) / hgt
+        left_margin = MARGIN_TH
+        for x in range(len(gray_column_ratios)):
+            if LIGHT_GRAY_LOWER_PERC < gray_column_ratios[x] < LIGHT_GRAY_UPPER_PERC:
+                left_margin = x
+                break
+
+    if (
+        top_margin >= MARGIN_TH
+        or bottom_margin >= MARGIN_TH
+        or left_margin >= MARGIN_TH
+        or right_margin >= MARGIN_TH
+    ):
+        return None
+    return top_margin, bottom_margin, left_margin, right_margin
+
+def get_crop_rect(lgt, hgt, top_margin, bottom_margin, left_margin, right_margin):
+    """
+    Return the (x, y, w, h) rectangle left by the margins, with the width and height
+    rounded up to even numbers for yuv420p and kept inside the frame
+    """
+    w = lgt - left_margin - right_margin
+    h = hgt - top_margin - bottom_margin
+    w += w % 2
+    h += h % 2
+    return min(left_margin, lgt - w), min(top_margin, hgt - h), w, h
+
+def get_crop_filter(crop_rect):
+    x, y, w, h = crop_rect
+    return f"crop={w}:{h}:{x}:{y}"
+
+def chunked_crop(video_path, out_path, crop_rect, thread_num):
+    """
+    Crop the video into out_path with up to thread_num ffmpeg processes at once
+
+    The frames are split into keyframe aligned chunks, each cropped and encoded by its
+    own process with an equal share of the CPU threads. The chunks are then joined with
+    the concat demuxer and the audio is copied over from the source. Returns False if
+    any chunk failed, in which case the caller falls back to a single process crop.
+    """
+    fps, lgt, hgt, frame_cnt = get_video_info(video_path)
+    frame_rate = get_frame_rate(video_path)
+    chunks = partition_frames(0, frame_cnt - 1, thread_num, get_keyframes(video_path, frame_rate))
+    threads_per_chunk = str(max(1, (os.cpu_count() or thread_num) // len(chunks)))
+    out_dir = os.path.dirname(out_path)
+    chunk_paths = [os.path.join(out_dir, "crop_chunk_" + str(idx) + ".mp4") for idx in range(len(chunks))]
+    results = [None] * len(chunks)
+
+    def encode_chunk(idx):
+        start, end = chunks[idx]
+        chunk_start = datetime.datetime.now()
+        cmd = ["ffmpeg", "-loglevel", "quiet", "-y"]
+        if start > 0:
+            cmd += ["-ss", frame_seconds(start - 0.5, frame_rate)]
+        cmd += ["-i", video_path, "-map", "0:v:0", "-frames:v", str(end - start + 1), "-an", "-sn"]
+        cmd += ["-vf", get_crop_filter(crop_rect) + ",setpts=PTS-STARTPTS", "-vsync", "passthrough"]
+        cmd += ["-c:v", CROP_ENCODER, "-preset", CROP_PRESET]
+        cmd += ["-crf", str(CROP_CRF), "-pix_fmt", "yuv420p", "-threads", threads_per_chunk, chunk_paths[idx]]
+        results[idx] = subprocess.call(cmd)
+        chunk_end = datetime.datetime.now()
+        logger.info(
+            t("log_crop_chunk_timing").format(idx + 1, len(chunks), end - start + 1, chunk_end - chunk_start)
+        )
+
+    threads = [threading.Thread(target=encode_chunk, args=(idx,)) for idx in range(len(chunks))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    succeeded = all(result == 0 for result in results) and all(os.path.exists(p) for p in chunk_paths)
+    if succeeded:
+        list_path = os.path.join(out_dir, "crop_chunks.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for chunk_path, (start, end) in zip(chunk_paths, chunks):
+                # the container duration of a chunk misses its last frame, so it is given explicitly
+                f.write("file '" + os.path.basename(chunk_path) + "'\n")
+                f.write("duration " + frame_seconds(end - start + 1, frame_rate) + "\n")
+        audio_info = get_audio_info(video_path)
+        cmd = ["ffmpeg", "-loglevel", "quiet", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_info is not None:
+            cmd += ["-i", video_path, "-map", "0:v", "-map", "1:a:0"]
+            cmd += ["-c:a", "copy"] if audio_info[0] == "aac" else ["-c:a", "aac"]
+        cmd += ["-c:v", "copy", out_path]
+        succeeded = subprocess.call(cmd) == 0
+        os.remove(list_path)
+    for chunk_path in chunk_paths:
+        if os.path.exists(chunk_path):
+            os.remove(chunk_path)
+    return succeeded
+
+def crop_video(video_path, out_path, crop_rect, thread_num):
+    """Crop the video into out_path, in parallel chunks with the "chunked" CROP_BACKEND"""
+    if CROP_BACKEND != "chunked" or not chunked_crop(video_path, out_path, crop_rect, thread_num):
+        # -y, a failed chunked crop can leave a partial out_path behind
+        subprocess.call(
+            ["ffmpeg", "-loglevel", "quiet", "-y", "-i", video_path, "-b:v", "0", "-vf", get_crop_filter(crop_rect), out_path]
+        )
+
+class PointCoordinates:
+    def __init__(self):
+        self.p_m_y, self.p_m_x = 0, 0
+        self.p_l_y, self.p_l_x = 0, 0
+        self.m_p_m_y_2, self.m_p_m_x_2 = 0, 0
+
+        self.m_p_l_y, self.m_p_l_x = 0, 0
+        self.m_p_m_y, self.m_p_m_x = 0, 0
+        self.m_p_r_y, self.m_p_r_x = 0, 0
+
+        self.acc_l_y, self.acc_l_x = 0, 0
+        self.acc_r_y, self.acc_r_x = 0, 0
+
+        self.vp_y, self.vp_x_1, self.vp_x_2, self.vp_x_3, self.vp_x_4 = 0, 0, 0, 0, 0
+        # self.vp_2_y, self.vp_2_x_1, self.vp_2_x_2, self.vp_2_x_3, self.vp_2_x_4 = (
+            # 0,
+            # 0,
+            # 0,
+            # 0,
+            # 0
+        # )
+
+    def calculate_or_use_coordinates(
+        self, lgt, hgt, top_margin, bottom_margin, left_margin, right_margin, detection_points=None
+    ):
+        if detection_points is not None:
+            array_1, array_2 = detection_points
+            self.acc_r_y = array_1[0][0]
+            self.acc_r_x = array_1[0][1]
+            self.acc_l_y = array_1[1][0]
+            self.acc_l_x = array_1[1][1]
+            self.p_m_y = array_1[2][0]
+            self.p_m_x = array_1[2][1]
+            self.p_l_y = array_1[3][0]
+            self.p_l_x = array_1[3][1]
+            self.m_p_l_y = array_2[0][0]
+            self.m_p_l_x = array_2[0][1]
+            self.m_p_m_y_2 = array_2[1][0]
+            self.m_p_m_x_2 = array_2[1][1]
+            self.m_p_m_y = array_2[2][0]
+            self.m_p_m_x = array_2[2][1]
+            self.m_p_r_y = array_2[3][0]
+            self.m_p_r_x = array_2[3][1]
+            self.vp_y = array_2[4][0]
+            self.vp_x_1 = array_2[4][1]
+            self.vp_x_2 = array_2[5][1]
+            self.vp_x_3 = array_2[6][1]
+            self.vp_x_4 = array_2[7][1]
+        else:
+            act_hgt = hgt - top_margin - bottom_margin
+            act_lgt = lgt - left_margin - right_margin
+            
+            if act_lgt * 1080 < act_hgt * 1920:
+                mdf_hgt = int(round(act_lgt / 1920 * 1080, 0))
+            else:
+                mdf_hgt = act_hgt
+
+            self.p_m_y = int(round(P_M_Y_CO * mdf_hgt + top_margin, 0))
+            self.p_m_x = int(round(lgt - P_M_X_CO * mdf_hgt - right_margin, 0))
+            # right top || middle
+            self.p_l_y = self.p_m_y
+            self.p_l_x = int(round(lgt - P_L_X_CO * mdf_hgt - right_margin, 0))
+            # right top || left
+
+            self.m_p_m_y_2 = int(round(M_P_M_Y_2_CO * act_hgt + top_margin, 0))
+            self.m_p_m_x_2 = int(
+                round(M_P_M_X_2_CO * (lgt - left_margin - right_margin) + left_margin, 0)
+            )
+            # middle PAUSE point (black point)
+
+            self.m_p_l_y = int(round(self.m_p_m_y_2 + M_P_L_Y_CO * mdf_hgt, 0))
+            self.m_p_l_x = int(round(self.m_p_m_x_2 - M_P_L_X_CO * mdf_hgt, 0))
+            # middle PAUSE left point (white point)
+            self.m_p_m_y = int(round(self.m_p_m_y_2 + M_P_M_Y_CO * mdf_hgt, 0))
+            self.m_p_m_x = self.m_p_m_x_2
+            # middle PAUSE middle point (white point)
+            self.m_p_r_y = int(round(self.m_p_m_y_2 - M_P_R_Y_CO * mdf_hgt, 0))
+            self.m_p_r_x = int(round(self.m_p_m_x_2 + M_P_R_X_CO * mdf_hgt, 0))
+            # middle PAUSE right point (white point)
+
+            self.acc_l_y = int(round(ACC_L_Y_CO * mdf_hgt + top_margin, 0))
+            self.acc_l_x = int(round(lgt - ACC_L_X_CO * mdf_hgt - right_margin, 0))
+            self.acc_r_y = self.acc_l_y
+            self.acc_r_x = int(round(lgt - ACC_R_X_CO * mdf_hgt - right_margin, 0))
+
+            self.vp_y = int(round(VP_Y_CO * act_hgt + top_margin, 0))
+            self.vp_x_1 = int(round(VP_X_1_CO * mdf_hgt + left_margin, 0))
+            self.vp_x_2 = int(round(VP_X_2_CO * mdf_hgt + left_margin, 0))
+            self.vp_x_3 = int(round(VP_X_3_CO * mdf_hgt + left_margin, 0))
+            self.vp_x_4 = int(round(VP_X_4_CO * mdf_hgt + left_margin, 0))
+
+            # self.vp_2_y = int(
+                # round(VP_Y_CO * act_hgt + top_margin - (VP_Y_CO - VP_2_Y_CO) * mdf_hgt, 0)
+            # )
+            # self.vp_2_x_1 = int(round(VP_2_X_1_CO * mdf_hgt + left_margin, 0))
+            # self.vp_2_x_2 = int(round(VP_2_X_2_CO * mdf_hgt + left_margin, 0))
+            # self.vp_2_x_3 = int(round(VP_2_X_3_CO * mdf_hgt + left_margin, 0))
+            # self.vp_2_x_4 = int(round(VP_2_X_4_CO * mdf_hgt + left_margin, 0))
+
+            #print(self.p_m_y, self.p_m_x)
+            #print(self.p_l_y, self.p_l_x)
+            #print(self.m_p_m_y_2, self.m_p_m_x_2)
+            #print(self.m_p_l_y, self.m_p_l_x)
+            #print(self.m_p_m_y, self.m_p_m_x)
+            #print(self.m_p_r_y, self.m_p_r_x)
+            #print(self.acc_l_y, self.acc_l_x)
+            #print(self.acc_r_y, self.acc_r_x)
+            #print(self.vp_y, self.vp_x_1, self.vp_x_2, self.vp_x_3, self.vp_x_4)
+            #print(self.vp_2_y, self.vp_2_x_1, self.vp_2_x_2, self.vp_2_x_3, self.vp_2_x_4)
+        
+        
+def get_job_geometry(job, lgt, hgt):
+    """Return the detection points and the crop rectangle (None without crop) of a job"""
+    pc = PointCoordinates()
+    pc.calculate_or_use_coordinates(
+        lgt, hgt, job.top_margin, job.bottom_margin, job.left_margin, job.right_margin, job.detection_points
+    )
+    # analysis always runs on the uncropped frames, the margins are cropped when writing
+    crop_rect = get_crop_rect(
+        lgt, hgt, job.top_margin, job.bottom_margin, job.left_margin, job.right_margin
+    ) if job.crop else None
+    return pc, crop_rect
+
+def get_probe_points(pc):
+    """Return the (ys, xs) fancy-index arrays of every detection pixel, in PROBE_* order"""
+    ys = [
+        pc.p_l_y, pc.p_m_y,
+        pc.m_p_l_y, pc.m_p_m_y, pc.m_p_r_y, pc.m_p_m_y_2,
+        pc.acc_r_y, pc.acc_l_y,
+    ]
+    xs = [
+        pc.p_l_x, pc.p_m_x,
+        pc.m_p_l_x, pc.m_p_m_x, pc.m_p_r_x, pc.m_p_m_x_2,
+        pc.acc_r_x, pc.acc_l_x,
+    ]
+    for dy in VP_ROW_OFFSETS:
+        for vp_x in (pc.vp_x_1, pc.vp_x_2, pc.vp_x_3, pc.vp_x_4):
+            ys.append(pc.vp_y + dy)
+            xs.append(vp_x)
+    return np.array(ys, dtype=np.intp), np.array(xs, dtype=np.intp)
+
+def gather_probes(frames, probe_points):
+    """Gather the detection pixels of one frame (H×W×3) or a stack of frames (N×H×W×3) into N×PROBE_CNT×3"""
+    ys, xs = probe_points
+    if frames.ndim == 3:
+        frames = frames[np.newaxis]
+    return frames[:, ys, xs]
+
+def classify_probes(probes):
+    """
+    Classify a batch of gathered detection pixels (N×PROBE_CNT×3)
+
+    Returns (pause, valid_pause, acceleration) boolean vectors of length N.
+    valid_pause is only ever True on pause frames.
+    """
+    p = probes.astype(np.int16)  # uint8 differences would wrap around
+
+    mean = p.mean(axis=2)
+    pause = np.abs(mean[:, PROBE_P_L] - mean[:, PROBE_P_M]) < P_DIFF_TH  # right top pause icon
+
+    m_l = p[:, PROBE_M_P_L]
+    m_m = p[:, PROBE_M_P_M]
+    m_r = p[:, PROBE_M_P_R]
+    m_2 = p[:, PROBE_M_P_M_2]
+    pause |= (
+        np.all(m_l > WHITE_10, axis=1)
+        & np.all(m_m > WHITE_10, axis=1)
+        & np.all(m_r > WHITE_10, axis=1)
+    )  # middle PAUSE text, white
+    pause |= (
+        np.all(m_m > GRAY, axis=1)
+        & np.all(np.abs(m_m - m_l) < M_P_DIFF_TH, axis=1)
+        & np.all(np.abs(m_m - m_r) < M_P_DIFF_TH, axis=1)
+        & np.all(np.abs(m_l - m_r) < M_P_DIFF_TH, axis=1)
+        & np.all(m_2 < GRAY, axis=1)
+    )  # middle PAUSE text, dimmed but uniform
+
+    acceleration = ~(
+        np.all(p[:, PROBE_ACC_R] > WHITE_9, axis=1)
+        & np.any(p[:, PROBE_ACC_L] < WHITE_9, axis=1)
+    )
+
+    vp_rows = p[:, PROBE_VP:].reshape(len(p), len(VP_ROW_OFFSETS), 4, 3)
+    vp_gray = np.all((GRAY_LOWER <= vp_rows) & (vp_rows <= GRAY_UPPER), axis=(2, 3))
+    valid_pause = pause & np.any(vp_gray, axis=1)
+
+    return pause, valid_pause, acceleration
+
+def classify_frames(frames, probe_points):
+    """Classify one frame or a stack of frames, see classify_probes"""
+    return classify_probes(gather_probes(frames, probe_points))
+
+def classify_stream(cap, start, end, probe_points, progress=None):
+    """
+    Read frames start..end (inclusive) from cap, which must already be positioned at start,
+    and classify them in batches of ANALYSIS_BATCH_SIZE
+
+    Yields (first_frame_index, pause, valid_pause, acceleration) per batch.
+    Stops early if the capture runs out of frames.
+    """
+    ys, xs = probe_points
+    buf = np.empty((ANALYSIS_BATCH_SIZE, len(ys), 3), dtype=np.uint8)
+    lo = start
+    n = 0
+    for i in range(start, end + 1):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        buf[n] = frame[ys, xs]
+        n += 1
+        if progress is not None:
+            progress(i)
+        if n == ANALYSIS_BATCH_SIZE:
+            yield (lo,) + classify_probes(buf)
+            lo += n
+            n = 0
+    if n > 0:
+        yield (lo,) + classify_probes(buf[:n])
+
+class FrameSource:
+    """
+    Position tracking wrapper of a cv2.VideoCapture or ProbeStripReader
+
+    Frames whose pixels are never looked at are passed with grab(), which demuxes and
+    decodes but skips the conversion to BGR and the copy into Python. advance_to() moves
+    to a later frame by grabbing or by seeking, whichever its cost model counts as fewer
+    decoded frames: grabbing costs the frames in between, a seek costs SEEK_COST_FRAMES
+    plus the frames from the keyframe before the target. Without keyframes the seek is
+    assumed to cost COARSE_SEEK_FRAMES. The frames read, grabbed and the seeks are
+    counted and logged on release().
+    """
+
+    def __init__(self, cap, keyframes=None):
+        self.cap = cap
+        self.keyframes = keyframes
+        self.pos = 0
+        self.read_cnt = 0
+        self.grab_cnt = 0
+        self.seek_cnt = 0
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            self.pos += 1
+            self.read_cnt += 1
+        return ret, frame
+
+    def grab(self):
+        ret = self.cap.grab()
+        if ret:
+            self.pos += 1
+            self.grab_cnt += 1
+        return ret
+
+    def seek(self, i):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+        self.pos = i
+        self.seek_cnt += 1
+
+    def set(self, prop, value):
+        # cv2.VideoCapture interface, seeking to the current position is free
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return self.cap.set(prop, value)
+        if int(value) != self.pos:
+            self.seek(int(value))
+        return True
+
+    def seek_cost(self, i):
+        if self.keyframes is None or len(self.keyframes) == 0:
+            return COARSE_SEEK_FRAMES
+        key_idx = np.searchsorted(self.keyframes, i, side="right") - 1
+        return SEEK_COST_FRAMES + i - (int(self.keyframes[key_idx]) if key_idx >= 0 else 0)
+
+    def advance_to(self, i):
+        """Position the source at frame i, the frames in between are not retrieved"""
+        if i < self.pos or i - self.pos > self.seek_cost(i):
+            self.seek(i)
+        else:
+            while self.pos < i and self.grab():
+                pass
+
+    def release(self):
+        if self.read_cnt or self.grab_cnt:
+            logger.info(t("log_frame_source_stats").format(self.read_cnt, self.grab_cnt, self.seek_cnt))
+        self.cap.release()
+
+class FrameProber:
+    """Classifies single frames at arbitrary positions of a FrameSource"""
+
+    def __init__(self, cap, probe_points):
+        self.cap = cap
+        self.probe_points = probe_points
+
+    def classify(self, i):
+        """Return the label code (pause * 4 + valid_pause * 2 + acceleration) of frame i"""
+        self.cap.advance_to(i)
+        ret, frame = self.cap.read()
+        if not ret:
+            return 0
+        pause, vp, acc = classify_frames(frame, self.probe_points)
+        return int(pause[0]) * 4 + int(vp[0]) * 2 + int(acc[0])
+
+def coarse_classify(cap, first, last, probe_points, stride):
+    """
+    Coarse-to-fine classification of frames first..last (inclusive)
+
+    Every stride-th frame is sampled, and wherever two neighbouring samples disagree
+    the gap is bisected down to frame precision. Around every transition found,
+    COARSE_VERIFY_RADIUS frames on each side are checked, and a gap whose checked
+    neighbourhood disagrees with the bisection is classified frame by frame.
+    A run that starts and ends between two agreeing samples can not be seen,
+    so stride is clamped to COARSE_MAX_GAP.
+
+    Returns (pause, valid_pause, acceleration, classified_cnt).
+    """
+    stride = max(1, min(stride, COARSE_MAX_GAP))
+    n = last - first + 1
+    codes = np.zeros(n, dtype=np.uint8)
+    known = np.full(n, False)
+    prober = FrameProber(cap, probe_points)
+
+    def check(k):
+        # classify frame k, return True if it disagrees with the filled in code
+        if known[k]:
+            return False
+        code = prober.classify(first + k)
+        known[k] = True
+        mismatch = code != codes[k]
+        codes[k] = code
+        return mismatch
+
+    def refine(a, b):
+        # a and b are classified, fill or bisect everything in between
+        stack = [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            if b - a <= 1:
+                continue
+            if codes[a] == codes[b]:
+                codes[a + 1:b] = codes[a]
+                continue
+            m = (a + b) // 2
+            check(m)
+            stack.append((m, b))
+            stack.append((a, m))
+
+    samples = list(range(0, n, stride))
+    if samples[-1] != n - 1:
+        samples.append(n - 1)
+    for k in samples:
+        check(k)
+    for a, b in zip(samples, samples[1:]):
+        refine(a, b)
+
+    verified = set()
+    dirty = True
+    while dirty:
+        dirty = False
+        for j in np.flatnonzero(codes[1:] != codes[:-1]) + 1:
+            if j in verified:
+                continue
+            verified.add(j)
+            for k in range(max(0, j - COARSE_VERIFY_RADIUS), min(n, j + COARSE_VERIFY_RADIUS)):
+                if check(k):
+                    gap = k // stride
+                    for g in range(gap * stride, min(n, (gap + 1) * stride + 1)):
+                        check(g)
+                    dirty = True
+
+    return (codes & 4) != 0, (codes & 2) != 0, (codes & 1) != 0, int(np.sum(known))
+
+def classify_range(process_num, cap, start, end, probe_points, progress=None):
+    """
+    Classify frames start..end (inclusive), cap must already be positioned at start
+
+    Yields the same (first_frame_index, pause, valid_pause, acceleration) batches as
+    classify_stream, using coarse_classify when ANALYSIS_STRIDE > 1.
+    """
+    if ANALYSIS_STRIDE <= 1:
+        yield from classify_stream(cap, start, end, probe_points, progress)
+        return
+    if end < start:
+        return
+    if progress is not None:
+        progress(start)
+    pause, vp, acc, classified_cnt = coarse_classify(cap, start, end, probe_points, ANALYSIS_STRIDE)
+    if progress is not None:
+        progress(end)
+    logger.info(t("log_thread_coarse_stats").format(process_num, classified_cnt, end - start + 1))
+    yield start, pause, vp, acc
+
+class ProbeStripReader:
+    """
+    Drop-in replacement for cv2.VideoCapture in the analysis stage
+
+    ffmpeg crops a 2x2 tile around every probe pixel before the colour conversion,
+    stacks the tiles into one small strip and streams it as bgr24 rawvideo over a pipe,
+    so only a few dozen pixels per frame are converted and copied into Python.
+    Tiles are aligned to even coordinates so they never split a 4:2:0 chroma sample.
+    Use get_strip_probe_points to index the strip instead of the full frame.
+    """
+
+    def __init__(self, video_path, frame_rate, lgt, hgt, probe_points):
+        self.video_path = video_path
+        self.frame_rate = frame_rate  # exact, the int fps drifts on 29.97 sources
+        self.tiles = get_probe_tiles(probe_points, lgt, hgt)
+        self.frame_size = PROBE_TILE_SIZE * PROBE_TILE_SIZE * len(self.tiles) * 3
+        self.pos = 0
+        self.proc = None
+
+    def _open(self):
+        cmd = ["ffmpeg", "-loglevel", "quiet"]
+        if self.pos > 0:
+            # half a frame early so rounding never lands on the next frame
+            cmd += ["-ss", frame_seconds(self.pos - 0.5, self.frame_rate)]
+        cmd += ["-i", self.video_path, "-an", "-sn", "-filter_complex", self._filter_graph()]
+        cmd += ["-map", "[strip]", "-vsync", "passthrough"]
+        cmd += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        self.proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL
+        )
+
+    def _filter_graph(self):
+        n = len(self.tiles)
+        crops = [
+            f"crop={PROBE_TILE_SIZE}:{PROBE_TILE_SIZE}:{x0}:{y0}" for y0, x0 in self.tiles
+        ]
+        if n == 1:
+            return "[0:v]" + crops[0] + ",format=bgr24[strip]"
+        graph = "[0:v]split=" + str(n) + "".join(f"[s{k}]" for k in range(n)) + ";"
+        graph += "".join(f"[s{k}]{crop}[t{k}];" for k, crop in enumerate(crops))
+        graph += "".join(f"[t{k}]" for k in range(n))
+        graph += f"hstack=inputs={n},format=bgr24[strip]"
+        return graph
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self.release()
+        self.pos = int(value)
+        return True
+
+    def read(self):
+        if self.proc is None:
+            self._open()
+        buf = self.proc.stdout.read(self.frame_size)
+        if len(buf) < self.frame_size:
+            return False, None
+        self.pos += 1
+        strip = np.frombuffer(buf, dtype=np.uint8).reshape(
+            PROBE_TILE_SIZE, PROBE_TILE_SIZE * len(self.tiles), 3
+        )
+        return True, strip
+
+    def grab(self):
+        # the strip is already tiny, nothing is saved by not returning it
+        return self.read()[0]
+
+    def release(self):
+        if self.proc is not None:
+            self.proc.stdout.close()
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+def get_probe_tiles(probe_points, lgt, hgt):
+    """Return the distinct (y0, x0) origins of the even-aligned tiles that cover every probe pixel"""
+    tiles = []
+    for y, x in zip(*probe_points):
+        y0 = min(int(y) - int(y) % 2, hgt - PROBE_TILE_SIZE)
+        x0 = min(int(x) - int(x) % 2, lgt - PROBE_TILE_SIZE)
+        if (y0, x0) not in tiles:
+            tiles.append((y0, x0))
+    return tiles
+
+def get_strip_probe_points(probe_points, tiles):
+    """Map full frame probe points to their position inside a ProbeStripReader strip"""
+    ys, xs = probe_points
+    strip_ys = np.empty_like(ys)
+    strip_xs = np.empty_like(xs)
+    for k, (y0, x0) in enumerate(tiles):
+        inside = (y0 <= ys) & (ys < y0 + PROBE_TILE_SIZE) & (x0 <= xs) & (xs < x0 + PROBE_TILE_SIZE)
+        strip_ys[inside] = ys[inside] - y0
+        strip_xs[inside] = xs[inside] - x0 + k * PROBE_TILE_SIZE
+    return strip_ys, strip_xs
+
+def open_analysis_source(video_path, pc, frame_rate, lgt, hgt):
+    """
+    Open a FrameSource for the analysis stage according to ANALYSIS_INPUT
+
+    Returns (cap, probe_points); probe_points index the frames that cap.read() returns.
+    The keyframes are only used if this process has already probed them.
+    """
+    probe_points = get_probe_points(pc)
+    keyframes = _keyframe_cache.get(video_path)
+    if ANALYSIS_INPUT == "strip" and ANALYSIS_STRIDE <= 1:  # coarse search needs cheap seeking
+        cap = ProbeStripReader(video_path, frame_rate, lgt, hgt, probe_points)
+        return FrameSource(cap, keyframes), get_strip_probe_points(probe_points, cap.tiles)
+    return FrameSource(cv2.VideoCapture(video_path), keyframes), probe_points
+
+class PauseTimeline:
+    """
+    Run-length encoded analysis result
+
+    Holds the maximal runs of frames starts[k]..ends[k]-1 that share one label, a
+    combination of PAUSE_BIT, VALID_PAUSE_BIT and KEEP_BIT. It is built with
+    np.flatnonzero on the label transitions, so the post-processing below and the split
+    into worker ranges loop over runs instead of frames.
+    """
+
+    def __init__(self, labels):
+        """labels is the per-frame label array"""
+        self.frame_cnt = len(labels)
+        self.starts = np.concatenate(([0], np.flatnonzero(labels[1:] != labels[:-1]) + 1))
+        self.ends = np.append(self.starts[1:], self.frame_cnt)
+        self.labels = labels[self.starts]
+
+    @classmethod
+    def from_flags(cls, pause_y_n, vp_y_n, keep_frame_y_n=None):
+        labels = pause_y_n * np.uint8(PAUSE_BIT) | vp_y_n * np.uint8(VALID_PAUSE_BIT)
+        if keep_frame_y_n is not None:
+            labels |= keep_frame_y_n * np.uint8(KEEP_BIT)
+        return cls(labels.astype(np.uint8))
+
+    def frame_labels(self):
+        return np.repeat(self.labels, self.ends - self.starts)
+
+    def flags(self, bit):
+        """Per-frame bool array of one flag"""
+        return np.repeat((self.labels & bit) != 0, self.ends - self.starts)
+
+    def runs(self, bit):
+        """(starts, ends, values) of the maximal runs of one flag"""
+        values = (self.labels & bit) != 0
+        first = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+        return self.starts[first], np.append(self.starts[first[1:]], self.frame_cnt), values[first]
+
+    def run_at(self, bit, frames):
+        """(start, end) of the run of one flag each of the given frames lies in"""
+        starts, ends, _ = self.runs(bit)
+        k = np.searchsorted(starts, frames, side="right") - 1
+        return starts[k], ends[k]
+
+    def with_flag(self, bit, starts, ends, value=True):
+        """Return a copy with one flag set to value over the frames starts[k]..ends[k]-1"""
+        marks = np.zeros(self.frame_cnt + 1, dtype=np.int64)
+        np.add.at(marks, np.asarray(starts, dtype=np.int64), 1)
+        np.add.at(marks, np.asarray(ends, dtype=np.int64), -1)
+        covered = np.cumsum(marks[:-1]) > 0
+        labels = self.frame_labels()
+        if value:
+            labels[covered] |= np.uint8(bit)
+        else:
+            labels[covered] &= np.uint8(~bit & 0xFF)
+        return PauseTimeline(labels)
+
+    def expand_valid_pauses(self):
+        """
+        Return a copy in which the pause runs next to a valid pause are valid pauses too
+
+        Walking the valid pause runs in order: the pause run ending right before a run is
+        marked, and the pause run starting right after it unless the run is a single
+        frame that already marked the run before it. Only the first frame of a run and the
+        frames from 1 to frame_cnt - 2 count, and a forward expansion covers the start of
+        the runs it reaches. This is what the original frame by frame scan did.
+        """
+        n = self.frame_cnt
+        pause = self.flags(PAUSE_BIT)
+        vp_starts, vp_ends, vp_values = self.runs(VALID_PAUSE_BIT)
+        fill_starts = []
+        fill_ends = []
+        expanded_end = 0  # frames before it were made valid by a forward expansion
+        for p, q in zip(vp_starts[vp_values], vp_ends[vp_values] - 1):
+            if q < expanded_end:
+                continue
+            backward = p >= expanded_end + 1 and 1 <= p <= n - 2 and pause[p - 1]
+            if backward:
+                run_start, _ = self.run_at(PAUSE_BIT, p - 1)
+                fill_starts.append(run_start)
+                fill_ends.append(p)
+            if not (backward and p == q) and 1 <= q <= n - 2 and pause[q + 1]:
+                _, run_end = self.run_at(PAUSE_BIT, q + 1)
+                fill_starts.append(q + 1)
+                fill_ends.append(run_end)
+                expanded_end = run_end
+        if not fill_starts:
+            return self
+        return self.with_flag(VALID_PAUSE_BIT, fill_starts, fill_ends)
+
+    def remove_short_runs(self, ignore_frame_cnt, first_bit=KEEP_BIT, second_bit=VALID_PAUSE_BIT):
+        """
+        Return a copy without the runs of at most ignore_frame_cnt frames
+
+        Frames 1..frame_cnt-2 that have first_bit (which wins) or second_bit set form
+        alternating runs, frames with neither do not break a run. Every run but the last
+        that is short has its flag cleared, up to the second last frame before the next
+        run. A run is short when its frames after the first are at most ignore_frame_cnt,
+        and a leading first_bit run counts its first frame as well.
+        """
+        n = self.frame_cnt
+        first = self.flags(first_bit)
+        positions = 1 + np.flatnonzero((first | self.flags(second_bit))[1:n - 1])
+        if len(positions) == 0:
+            return self
+        in_second = ~first[positions]
+        run_idx = np.concatenate(([0], np.flatnonzero(in_second[1:] != in_second[:-1]) + 1))
+        run_starts = positions[run_idx]
+        run_labels = in_second[run_idx]
+        lengths = np.diff(np.append(run_idx, len(positions))) - 1
+        clear_starts = run_starts.copy()
+        if not run_labels[0]:
+            # the scan starts in a first_bit run at frame 0
+            lengths[0] += 1
+            clear_starts[0] = 0
+        else:
+            # the empty first_bit run the scan starts in is always short
+            run_starts = np.concatenate(([0], run_starts))
+            run_labels = np.concatenate(([False], run_labels))
+            lengths = np.concatenate(([0], lengths))
+            clear_starts = np.concatenate(([0], clear_starts))
+        clear_ends = run_starts[1:] - 1
+        short = (lengths[:-1] <= ignore_frame_cnt) & (clear_ends > clear_starts[:-1])
+        timeline = self
+        for bit, in_run in ((first_bit, ~run_labels[:-1]), (second_bit, run_labels[:-1])):
+            mask = short & in_run
+            if np.any(mask):
+                timeline = timeline.with_flag(bit, clear_starts[:-1][mask], clear_ends[mask], False)
+        return timeline
+
+    def split(self, ranges):
+        """
+        Split the segments into one list per (start, end) worker range
+
+        The start of every range moves to the next pause transition so no segment is split
+        between two workers, ranges left without a segment are dropped.
+        """
+        segments = self.segments()
+        starts = np.array([start for _, start, _, _ in segments])
+        seg_cnts = [0]
+        for start, end in ranges[1:]:
+            idx = int(np.searchsorted(starts, start))
+            if idx < len(segments) and idx > seg_cnts[-1]:
+                seg_cnts.append(idx)
+        seg_cnts.append(len(segments))
+        return [segments[first:last] for first, last in zip(seg_cnts[:-1], seg_cnts[1:])]
+
+    def segments(self):
+        """
+        Return (index, start, end, suffix) for every normal mode segment, frames start..end-1:
+        the pause runs, labelled by the valid pause flag of their first frame
+        """
+        starts, ends, pauses = self.runs(PAUSE_BIT)
+        labels = self.labels[np.searchsorted(self.starts, starts, side="right") - 1]
+        return [
+            (idx, int(start), int(end), get_file_suffix((label & VALID_PAUSE_BIT) != 0, pause))
+            for idx, (start, end, label, pause) in enumerate(zip(starts, ends, labels, pauses))
+        ]
+
+def print_progress(i, start, end, start_key, end_key, *format_args):
+    # records carry (start_key, worker, fraction done) for handlers that follow the workers
+    progress = (start_key, format_args[0] if format_args else None)
+    if i == start:
+        logger.info(
+            t(start_key).format(*format_args) if format_args else t(start_key),
+            extra={"progress": progress + (1.0 if i == end else 0.0,)},
+        )
+    elif i == end:
+        logger.info(
+            t(end_key).format(*format_args) if format_args else t(end_key),
+            extra={"progress": progress + (1.0,)},
+        )
+    elif (
+        (i - start) % ((end - start) / SHOW_PROGRESS_SEG) < 1 and i > start and i < end
+    ):
+        logger.info(
+            f"{(i - start) / (end - start):.0%}", extra={"progress": progress + ((i - start) / (end - start),)}
+        )
+
+def get_file_suffix(vp_value, pause_value):
+    if vp_value == True:
+        return t("valid_pause")
+    elif pause_value == True:
+        return t("invalid_pause")
+    else:
+        return ""
+
+def cleanup(working_path, manifest=(), ignore_frame_cnt=0):
+    """
+    Remove the temporary files and the outputs the manifest lists as at most
+    ignore_frame_cnt frames long. Lengths come from the (name, frames, label) manifest
+    entries, no output is reopened to count its frames.
+    """
+    tc = TimeCost()
+    tc.time_start(t("log_timing_cleaning_segments"))
+    for name in os.listdir(working_path):
+        if name.startswith(TEMP_PREFIX):
+            full_file_path = os.path.join(working_path, name)
+            os.remove(full_file_path)
+            # Remove from cache if present
+            _video_metadata_cache.pop(full_file_path, None)
+    for entry in manifest:
+        if is_ignored(entry, ignore_frame_cnt):
+            full_file_path = os.path.join(working_path, entry[0])
+            # normal mode never writes these, lazy mode output is only known after rendering
+            if os.path.exists(full_file_path):
+                os.remove(full_file_path)
+                _video_metadata_cache.pop(full_file_path, None)
+            logger.info(t("log_segment_deleted").format(entry[0]))
+    tc.time_end()
+
+class TimeCost:
+    def __init__(self):
+        self.start = datetime
+        self.end = datetime
+
+    def time_start(self, process_name):
+        self.start = datetime.datetime.now()
+        logger.info(t("log_timing_for").format(process_name))
+        logger.info(t("log_timing_started").format(self.start))
+
+    def time_end(self):
+        self.end = datetime.datetime.now()
+        logger.info(t("log_timing_ended").format(self.end))
+        logger.info(t("log_time_elapsed").format(self.end - self.start))
+
+
+def get_video_fingerprint(video_path):
+    """Fast content fingerprint: size, mtime and a hash of the first and last ANALYSIS_CACHE_HASH_BYTES"""
+    stat = os.stat(video_path)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(video_path, "rb") as f:
+        digest.update(f.read(ANALYSIS_CACHE_HASH_BYTES))
+        if stat.st_size > ANALYSIS_CACHE_HASH_BYTES:
+            f.seek(max(ANALYSIS_CACHE_HASH_BYTES, stat.st_size - ANALYSIS_CACHE_HASH_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def get_analysis_cache_path(analyze, video_path, pc, start_f, end_f, frame_cnt):
+    """Cache file of one analysis run, keyed by the video content and every detection setting"""
+    key = hashlib.sha1()
+    for part in (
+        ANALYSIS_CACHE_VERSION,
+        analyze.__name__,
+        get_video_fingerprint(video_path),
+        sorted(vars(pc).items()),
+        (start_f, end_f, frame_cnt),
+        sorted(get_analysis_settings().items()),
+    ):
+        key.update(repr(part).encode())
+    return os.path.join(analysis_cache_path, key.hexdigest() + ".npz")
+
+def load_analysis_cache(cache_path, *flags):
+    """Fill flags from cache_path, returns False if there is no usable cache entry"""
+    try:
+        with np.load(cache_path) as cached:
+            packed = [cached["flag_" + str(k)] for k in range(len(flags))]
+    except (OSError, KeyError, ValueError):
+        return False
+    for flag, bits in zip(flags, packed):
+        flag[:] = np.unpackbits(bits, count=len(flag)).astype(bool)
+    return True
+
+def save_analysis_cache(cache_path, *flags):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez_compressed(
+            f, **{"flag_" + str(k): np.packbits(flag) for k, flag in enumerate(flags)}
+        )
+    os.replace(temp_path, cache_path)
+
+def get_analysis_settings(names=ANALYSIS_SETTING_NAMES):
+    """The values of the given module settings, by default the ones the analysis result depends on"""
+    return {name: globals()[name] for name in names}
+
+class ForwardLogHandler(logging.Handler):
+    """Hands the records of analysis worker processes to the logger of the same name in this process"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+def init_analysis_worker(log_queue, level):
+    """
+    Process pool initializer: send every record to the parent through log_queue
+
+    Spawned workers start without the handlers of the parent, the progress records of
+    pause_analyze would otherwise never reach the GUI log or the CLI progress events.
+    """
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+def analyze_in_process(
+    analyze, process_num, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, start, end, frame_cnt, flag_cnt,
+    language, settings
+):
+    """Process pool entry point: analyse start..end and return the flag slices bit-packed"""
+    set_language(language, notify=False)
+    globals().update(settings)
+    cap, probe_points = open_analysis_source(video_path, pc, frame_rate, lgt, hgt)
+    flags = [np.full(frame_cnt, False) for _ in range(flag_cnt)]
+    analyze(process_num, start_f, end_f, start, end, cap, probe_points, *flags)
+    return [np.packbits(flag[start:end + 1]) for flag in flags]
+
+def run_analysis(analyze, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, *flags):
+    """
+    Run analyze (pause_analyze) over every (start, end) range in parallel
+
+    flags are the frame_cnt long flag arrays analyze fills in, in its argument order.
+    ANALYSIS_BACKEND selects threads sharing the arrays or a process pool whose
+    workers send back bit-packed slices. With ANALYSIS_CACHE the results are stored
+    under analysis_cache_path and a later run with the same video and settings
+    skips the analysis entirely.
+    """
+    if ANALYSIS_CACHE:
+        cache_path = get_analysis_cache_path(analyze, video_path, pc, start_f, end_f, len(flags[0]))
+        if load_analysis_cache(cache_path, *flags):
+            logger.info(t("log_analysis_cache_hit"))
+            return
+        run_analysis_uncached(analyze, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, *flags)
+        try:
+            save_analysis_cache(cache_path, *flags)
+        except OSError:
+            pass  # the cache is only an optimization
+        return
+    run_analysis_uncached(analyze, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, *flags)
+
+def run_analysis_pool(
+    analyze, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, context, log_queue, *flags
+):
+    """The process pool of run_analysis_uncached, its workers log through log_queue"""
+    with ProcessPoolExecutor(
+        max_workers=len(ranges), mp_context=context, initializer=init_analysis_worker,
+        initargs=(log_queue, logger.getEffectiveLevel())
+    ) as pool:
+        futures = [
+            pool.submit(
+                analyze_in_process,
+                analyze,
+                worker_idx,
+                video_path,
+                pc,
+                frame_rate,
+                lgt,
+                hgt,
+                start_f,
+                end_f,
+                start,
+                end,
+                len(flags[0]),
+                len(flags),
+                get_current_language(),
+                # spawned workers do not inherit module settings changed at runtime
+                get_analysis_settings(ANALYSIS_WORKER_SETTING_NAMES),
+            )
+            for worker_idx, (start, end) in enumerate(ranges)
+        ]
+        for (start, end), future in zip(ranges, futures):
+            for flag, packed in zip(flags, future.result()):
+                flag_slice = flag[start:end + 1]
+                flag_slice |= np.unpackbits(packed, count=len(flag_slice)).astype(bool)
+
+def run_analysis_uncached(analyze, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, *flags):
+    if ANALYSIS_BACKEND == "process":
+        # a forked worker can inherit a decoder lock held by another thread and hang
+        context = multiprocessing.get_context("spawn")
+        log_queue = context.Queue()
+        listener = logging.handlers.QueueListener(log_queue, ForwardLogHandler())
+        listener.start()
+        try:
+            run_analysis_pool(
+                analyze, video_path, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, context, log_queue, *flags
+            )
+        finally:
+            listener.stop()  # the workers have exited, every record they sent is handled first
+        return
+
+    threads = []
+    for worker_idx, (start, end) in enumerate(ranges):
+        # Create independent frame source to avoid resource conflicts
+        cap_t, probe_points = open_analysis_source(video_path, pc, frame_rate, lgt, hgt)
+        thread = threading.Thread(
+            target=analyze,
+            args=(worker_idx, start_f, end_f, start, end, cap_t, probe_points) + flags
+        )
+        threads.append(thread)
+        thread.start()
+
+    # Wait for all threads to complete
+    for thread in threads:
+        thread.join()
+
+def lazy_decimate(slow_frames):
+    """
+    Pick every second frame of the 1x speed frames so they play at 2x
+
+    Odd frame indices are kept, so the result does not depend on how the video was
+    split between workers.
+    """
+    return slow_frames[slow_frames % 2 == 1]
+
+def pause_analyze(
+    process_num, start_f, end_f, start, end, cap, probe_points, pause_y_n, vp_y_n, keep_frame_y_n
+):
+    """
+    Analysis stage shared by every mode: classify frames start..end and fill in the
+    pause, valid pause and lazy mode keep flags
+    """
+    # frames outside the start/end window are always kept, without being looked at
+    keep_frame_y_n[start:min(end, start_f - 1) + 1] = True
+    keep_frame_y_n[max(start, end_f + 1):end + 1] = True
+    first = max(start, start_f)
+    last = min(end, end_f)
+    if first <= last:
+        cap.advance_to(first)
+    for lo, pause, vp, acc in classify_range(
+        process_num,
+        cap,
+        first,
+        last,
+        probe_points,
+        lambda i: print_progress(
+            i, start, end, "log_thread_analyze_pause_start", "log_thread_100_percent", process_num
+        ),
+    ):
+        hi = lo + len(pause)
+        pause_y_n[lo:hi] = pause
+        vp_y_n[lo:hi] = vp
+        keep_frame_y_n[lo:hi] |= ~pause & acc
+        keep_frame_y_n[lazy_decimate(lo + np.flatnonzero(~pause & ~acc))] = True
+    cap.release()
+
+class FrameEncoder:
+    """
+    ffmpeg encoder process fed raw BGR frames over its stdin, a drop-in for the
+    write/release subset of cv2.VideoWriter
+
+    When segment_starts (ascending frame offsets, the first one 0) has more than one
+    entry, the segment muxer splits the output at those frames into the numbered files
+    out_path % (start_number + k), each segment starting on a forced keyframe.
+    Frames of the given size are cropped to crop_rect by ffmpeg when it is set.
+    """
+
+    def __init__(self, out_path, frame_rate, size, segment_starts=None, start_number=0, crop_rect=None):
+        cmd = [
+            "ffmpeg", "-loglevel", "quiet", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{size[0]}x{size[1]}", "-r", str(frame_rate), "-i", "-",
+        ]
+        if crop_rect is not None:
+            cmd += ["-vf", get_crop_filter(crop_rect)]
+        cmd += [
+            "-c:v", WRITER_ENCODER, "-preset", WRITER_PRESET, "-crf", str(WRITER_CRF), "-pix_fmt", "yuv420p",
+        ]
+        if segment_starts is not None and len(segment_starts) > 1:
+            cuts = segment_starts[1:]
+            cmd += [
+                # half a frame early so the keyframe lands on the cut frame itself
+                "-force_key_frames", ",".join(frame_seconds(cut - 0.5, frame_rate) for cut in cuts),
+                "-f", "segment", "-segment_format", "mp4", "-reset_timestamps", "1",
+                "-segment_frames", ",".join(str(cut) for cut in cuts),
+                "-segment_start_number", str(start_number),
+                out_path,
+            ]
+        elif segment_starts is not None:
+            cmd.append(out_path % start_number)
+        else:
+            cmd.append(out_path)
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        if frame is not None:
+            self.proc.stdin.write(np.ascontiguousarray(frame).data)
+
+    def release(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+class CroppedVideoWriter:
+    """cv2.VideoWriter that crops every frame to crop_rect before writing it"""
+
+    def __init__(self, out_path, frame_rate, crop_rect):
+        self.x, self.y, self.w, self.h = crop_rect
+        self.out = cv2.VideoWriter(out_path, FOURCC, float(frame_rate), (self.w, self.h))
+
+    def write(self, frame):
+        if frame is not None:
+            self.out.write(np.ascontiguousarray(frame[self.y:self.y + self.h, self.x:self.x + self.w]))
+
+    def release(self):
+        self.out.release()
+
+def open_cv_writer(out_path, frame_rate, size, crop_rect=None):
+    """Open a cv2.VideoWriter with FOURCC for frames of the given size, cropped to crop_rect if set"""
+    if crop_rect is None:
+        return cv2.VideoWriter(out_path, FOURCC, float(frame_rate), size)
+    return CroppedVideoWriter(out_path, frame_rate, crop_rect)
+
+def open_frame_writer(out_path, frame_rate, size, crop_rect=None):
+    """Open the WRITER_BACKEND writer for a single output file"""
+    if WRITER_BACKEND == "ffmpeg":
+        return FrameEncoder(out_path, frame_rate, size, crop_rect=crop_rect)
+    return open_cv_writer(out_path, frame_rate, size, crop_rect)
+
+def lazy_video_generate(
+    process_num, working_path, start, end, cap, keep_frame_y_n, vp_y_n, frame_rate, lgt, hgt, crop_rect=None
+):
+    size = (lgt, hgt)  
+    out = open_frame_writer(
+        working_path + TEMP_PREFIX + str(process_num) + ".mp4", frame_rate, size, crop_rect
+    )
+    for i in range(start, end):
+        if keep_frame_y_n[i] == True or vp_y_n[i] == True:
+            # dropped frames in between are grabbed or seeked over, never retrieved
+            cap.advance_to(i)
+            ret, frame = cap.read()
+            out.write(frame)
+        print_progress(
+            i,
+            start,
+            end - 1,
+            "log_thread_cut_pause_accel_start",
+            "log_thread_100_percent",
+            process_num,
+        )
+
+    out.release()
+    # print("Thread " + str(process_num) + " generated file out_" + str(index) + vp + ".mp4")
+    cap.release()
+
+def lazy_stream_generate(
+    process_num, working_path, start_f, end_f, start, end, cap, probe_points, pause_y_n, vp_y_n, keep_frame_y_n,
+    keep_valid_pause, max_pending, abort, written_cnts, frame_rate, lgt, hgt, crop_rect=None
+):
+    """
+    Single decode lazy mode: classify frames start..end and write the kept ones in the same pass
+
+    The analysis flags are filled in exactly like pause_analyze does, and the frames
+    written are the ones the two-pass render keeps after PauseTimeline.expand_valid_pauses:
+    frames of a pause run wait in a bounded buffer until a valid pause in the run decides
+    them, and are dropped when the run ends undecided. A pause run crossing end is
+    finished by reading ahead, and the worker of the next range skips that run at its
+    start. If more than max_pending frames wait at once, abort is set and the caller falls
+    back to the two-pass pipeline. The number of frames written is stored in
+    written_cnts[process_num].
+    """
+    out = open_frame_writer(
+        working_path + TEMP_PREFIX + str(process_num) + ".mp4", frame_rate, (lgt, hgt), crop_rect
+    )
+    ys, xs = probe_points
+    frame_cnt = len(pause_y_n)
+    pending = collections.deque()  # frames of the current pause run that are not written yet
+    in_run = False                 # the previous frame was a pause
+    run_start = 0
+    vp_start = None                # first frame of the valid pause run the previous frame is in
+    vp_backward = False            # that valid pause run wrote the frames before it
+    filling = False                # the rest of the pause run is written
+    written_cnt = 0
+
+    def write(frame):
+        nonlocal written_cnt
+        out.write(frame)
+        written_cnt += 1
+
+    def in_window(i):
+        return start_f <= i <= end_f
+
+    def read_classified(i):
+        ret, frame = cap.read()
+        if not ret:
+            return None, False, False, False
+        if not in_window(i):
+            return frame, False, False, True  # kept as is
+        pause, vp, acc = classify_probes(frame[ys, xs][np.newaxis])
+        return frame, pause[0], vp[0], acc[0]
+
+    def progress(i):
+        print_progress(
+            i, start, end, "log_thread_cut_pause_accel_start", "log_thread_100_percent", process_num
+        )
+
+    i = start
+    frame = None
+    if keep_valid_pause and start > 0 and in_window(start) and in_window(start - 1):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+        _, prev_pause, _, _ = read_classified(start - 1)
+        # the previous worker finishes a pause run that crosses into this range, skip it
+        while prev_pause and i <= end:
+            frame, pause, vp, acc = read_classified(i)
+            if frame is None or not pause:
+                break
+            progress(i)
+            frame = None
+            i += 1
+    else:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    while i <= end or (keep_valid_pause and in_run):
+        if abort.is_set():
+            break
+        if frame is None:
+            if i >= frame_cnt:
+                break
+            frame, pause, vp, acc = read_classified(i)
+            if frame is None:
+                break
+        if i > end and not pause:
+            break  # the pause run crossing end is finished
+        if in_window(i):
+            pause_y_n[i] = pause
+            vp_y_n[i] = vp
+        if not pause:
+            pending.clear()
+            in_run = filling = False
+            vp_start = None
+            if not in_window(i) or acc or i % 2 == 1:  # see lazy_decimate
+                keep_frame_y_n[i] = True
+                write(frame)
+        elif not keep_valid_pause:
+            in_run = True
+        else:
+            if not in_run:
+                in_run = True
+                run_start = i
+            # the rules of expand_valid_pauses, which only looks at frames 1..frame_cnt-2
+            if filling:
+                write(frame)
+            elif vp:
+                if vp_start is None:
+                    vp_start = i
+                    vp_backward = run_start < i <= frame_cnt - 2
+                    if vp_backward:
+                        while pending:
+                            write(pending.popleft())
+                write(frame)
+            else:
+                if vp_start is not None:
+                    # a valid pause run ends inside the pause run, a single frame one that
+                    # wrote the frames before it does not write the ones after it
+                    last_vp = i - 1
+                    filling = not (vp_backward and vp_start == last_vp) and last_vp >= 1
+                    vp_start = None
+                if filling:
+                    write(frame)
+                else:
+                    pending.append(frame)
+                    if len(pending) > max_pending:
+                        abort.set()
+                        break
+        if i <= end:
+            progress(i)
+        frame = None
+        i += 1
+
+    out.release()
+    cap.release()
+    written_cnts[process_num] = written_cnt
+
+def lazy_stream_version(
+    video_path, working_path, mode, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, pause_y_n, vp_y_n, keep_frame_y_n,
+    crop_rect=None
+):
+    """
+    Run lazy_stream_generate over every range
+
+    Returns the number of frames each worker wrote, or None if the pending buffer
+    overflowed. On success the analysis flags are complete and cached like run_analysis
+    caches them.
+    """
+    max_pending = max(
+        1, LAZY_STREAM_MAX_PENDING_MB * 1024 * 1024 // (lgt * hgt * 3) // len(ranges)
+    )
+    keyframes = get_keyframes(video_path, frame_rate)
+    abort = threading.Event()
+    written_cnts = [0] * len(ranges)
+    threads = []
+    for thread_idx, (start, end) in enumerate(ranges):
+        cap_t = FrameSource(cv2.VideoCapture(video_path), keyframes)
+        thread = threading.Thread(
+            target=lazy_stream_generate,
+            args=(
+                thread_idx, working_path, start_f, end_f, start, end, cap_t, get_probe_points(pc),
+                pause_y_n, vp_y_n, keep_frame_y_n, mode == 2, max_pending, abort, written_cnts, frame_rate, lgt,
+                hgt, crop_rect
+            )
+        )
+        threads.append(thread)
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    if abort.is_set():
+        return None
+    if ANALYSIS_CACHE:
+        try:
+            save_analysis_cache(
+                get_analysis_cache_path(pause_analyze, video_path, pc, start_f, end_f, len(pause_y_n)),
+                pause_y_n,
+                vp_y_n,
+                keep_frame_y_n,
+            )
+        except OSError:
+            pass  # the cache is only an optimization
+    return written_cnts
+
+def lazy_version(job):
+    video_path, mode, thread_num, ignore_frame_cnt = job.video_path, job.mode, job.thread_num, job.ignore_frame_cnt
+    working_path = os.path.join(job.working_path, "")
+    _, lgt, hgt, frame_cnt = get_video_info(video_path)
+    frame_rate = job.frame_rate
+
+    start_f = int(job.start_second * frame_rate)  # start frame (will keep frames before this)
+    end_f = min(int(job.end_second * frame_rate), frame_cnt - 1)  # end frame   (will keep frames after this)
+
+    pc, crop_rect = get_job_geometry(job, lgt, hgt)
+
+    pause_y_n = np.full(frame_cnt, False)  # True means a pause, False means not a pause
+    vp_y_n = np.full(frame_cnt, False)
+    keep_frame_y_n = np.full(frame_cnt, False)  # True means keep, False means no keep
+    keyframes = get_keyframes(video_path, frame_rate)
+    # every frame of the video, split for the generation workers
+    ranges = partition_frames(0, frame_cnt - 1, thread_num, keyframes)
+
+    tc = TimeCost()
+
+    # frames outside the start/end window are always kept and never analysed
+    keep_frame_y_n[:start_f] = True
+    keep_frame_y_n[end_f + 1:] = True
+
+    written_cnts = None  # frames of each worker when the analysis and the render were streamed
+    if (
+        LAZY_STREAMING
+        and ignore_frame_cnt == 0  # short run removal needs the whole timeline
+        and not (
+            ANALYSIS_CACHE
+            and os.path.exists(
+                get_analysis_cache_path(pause_analyze, video_path, pc, start_f, end_f, frame_cnt)
+            )
+        )
+    ):
+        tc.time_start(t("log_timing_generating_video"))
+        written_cnts = lazy_stream_version(
+            video_path, working_path, mode, pc, frame_rate, lgt, hgt, start_f, end_f, ranges, pause_y_n, vp_y_n,
+            keep_frame_y_n, crop_rect
+        )
+        tc.time_end()
+        if written_cnts is None:
+            logger.info(t("log_lazy_stream_fallback"))
+            pause_y_n[:] = False
+            vp_y_n[:] = False
+            keep_frame_y_n[start_f:end_f + 1] = False
+
+    tc.time_start(t("log_timing_analyzing_pauses"))
+
+    if written_cnts is None:
+        run_analysis(
+            pause_analyze,
+            video_path,
+            pc,
+            frame_rate,
+            lgt,
+            hgt,
+            start_f,
+            end_f,
+            partition_frames(start_f, end_f, thread_num, keyframes),
+            pause_y_n,
+            vp_y_n,
+            keep_frame_y_n,
+        )
+
+    timeline = PauseTimeline.from_flags(pause_y_n, vp_y_n, keep_frame_y_n)
+    if mode == 2:  # "Lazy mode (keep valid pauses)" index
+        timeline = timeline.expand_valid_pauses()
+        if ignore_frame_cnt > 0:
+            timeline = timeline.remove_short_runs(ignore_frame_cnt)
+        vp_y_n[:] = timeline.flags(VALID_PAUSE_BIT)
+    else:  # Lazy mode (cut all pauses)
+        vp_y_n[:] = False
+        if ignore_frame_cnt > 0:
+            # every pause is cut, so short kept runs are measured against all pauses
+            timeline = timeline.remove_short_runs(ignore_frame_cnt, KEEP_BIT, PAUSE_BIT)
+    keep_frame_y_n[:] = timeline.flags(KEEP_BIT)
+
+    tc.time_end()
+
+    tc.time_start(t("log_timing_generating_video"))
+    manifest = [("output.mp4", int(np.count_nonzero(keep_frame_y_n | vp_y_n)), "")]
+
+    failures = []  # outputs that could not be written
+    if written_cnts is not None:
+        # the workers wrote exactly the frames kept here, only their audio is left to cut
+        runs = get_lazy_runs(keep_frame_y_n | vp_y_n)
+        workers = [thread_idx for thread_idx, written_cnt in enumerate(written_cnts) if written_cnt > 0]
+        if sum(written_cnts) != manifest[0][1] or (
+            workers
+            and not concat_lazy_output(
+                working_path, workers, video_path, get_lazy_audio_graph(video_path, runs, frame_rate, 1)
+            )
+        ):
+            failures.append("output.mp4")
+        tc.time_end()
+        cleanup(working_path, manifest, ignore_frame_cnt)
+        check_failures(failures)
+        return
+    if LAZY_RENDER == "filter":
+        if not filter_lazy_render(video_path, working_path, keep_frame_y_n | vp_y_n, frame_rate, crop_rect):
+            failures.append("output.mp4")
+        tc.time_end()
+        cleanup(working_path, manifest, ignore_frame_cnt)
+        check_failures(failures)
+        return
+
+    threads = []
+
+    for thread_idx, (start, last) in enumerate(ranges):
+        cap_t = FrameSource(cv2.VideoCapture(video_path), keyframes)
+        end = last + 1
+
+        thread = threading.Thread(
+            target=lazy_video_generate,
+            args=(thread_idx, working_path, start, end, cap_t, keep_frame_y_n, vp_y_n, frame_rate, lgt, hgt, crop_rect)
+        )
+        threads.append(thread)
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    tc.time_end()
+
+    kept = keep_frame_y_n | vp_y_n
+    workers = [thread_idx for thread_idx, (start, last) in enumerate(ranges) if np.any(kept[start:last + 1])]
+    if workers and not concat_lazy_output(working_path, workers):
+        failures.append("output.mp4")
+    cleanup(working_path, manifest, ignore_frame_cnt)
+    check_failures(failures)
+
+def get_audio_info(video_path):
+    """Return (codec_name, sample_rate) of the first audio stream, or None if the video has no audio"""
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet", "-select_streams", "a:0",
+                "-show_entries", "stream=codec_name,sample_rate", "-of", "csv=p=0", video_path,
+            ],
+            capture_output=True,
+            text=True,
+        ).stdout
+    except OSError:
+        return None
+    fields = output.strip().split(",")
+    if len(fields) < 2 or not fields[1].isdigit():
+        return None
+    return fields[0], int(fields[1])
+
+def get_lazy_runs(kept):
+    """
+    Split the kept frames of lazy mode into runs (first, last, step)
+
+    step is 2 inside 1x speed sections, where every second frame is kept, and 1
+    elsewhere.
+    """
+    kept_idx = np.flatnonzero(kept)
+    if len(kept_idx) == 0:
+        return []
+    gaps = np.diff(kept_idx, append=kept_idx[-1] + 1)
+    steps = np.where(gaps == 2, 2, 1)
+    new_run = np.ones(len(kept_idx), dtype=bool)
+    new_run[1:] = (steps[1:] != steps[:-1]) | (gaps[:-1] != steps[:-1])
+    firsts = np.flatnonzero(new_run)
+    lasts = np.append(firsts[1:], len(kept_idx)) - 1
+    return [
+        (int(kept_idx[first]), int(kept_idx[last]), int(steps[first]))
+        for first, last in zip(firsts, lasts)
+    ]
+
+def frame_select_expr(intervals):
+    """
+    ffmpeg select (or aselect) expression keeping frame n inside any of the sorted
+    (first, last, step) intervals, nested as a balanced if() tree so each frame
+    evaluates O(log n) terms
+    """
+    if len(intervals) == 1:
+        first, last, step = intervals[0]
+        expr = f"between(n,{first},{last})"
+        return expr + f"*not(mod(n-{first},2))" if step == 2 else expr
+    mid = len(intervals) // 2
+    return (
+        f"if(lt(n,{intervals[mid][0]}),"
+        f"{frame_select_expr(intervals[:mid])},{frame_select_expr(intervals[mid:])})"
+    )
+
+def get_audio_chunk_runs(runs, chunks_per_frame):
+    """
+    The (first, last, step) runs of audio chunks that go with the video runs of get_lazy_runs
+
+    A chunk holds about one frame of audio, chunks_per_frame is the exact ratio. Like the
+    video, a step 2 run keeps every second chunk. Every run keeps as many chunks as it has
+    frames, rounded on the running total, so the audio never drifts more than about a chunk
+    from the video however many runs there are.
+    """
+    chunk_runs = []
+    frame_total = chunk_total = 0
+    next_chunk = 0
+    for first, last, step in runs:
+        frame_total += (last - first) // step + 1
+        count = round(frame_total * chunks_per_frame) - chunk_total
+        if count <= 0:
+            continue
+        chunk_total += count
+        start = max(round(first * chunks_per_frame), next_chunk)
+        chunk_runs.append((start, start + (count - 1) * step, step))
+        next_chunk = start + (count - 1) * step + 1
+    return chunk_runs
+
+def get_lazy_audio_graph(video_path, runs, frame_rate, input_idx=0):
+    """
+    The filter chain keeping the audio that goes with the get_lazy_runs runs, read from
+    input input_idx and labelled [a], or None if the video has no audio
+
+    The audio is cut into chunks of about one frame and aselect keeps the chunks of the
+    kept frames with the same kind of expression select uses for the video.
+    """
+    audio_info = get_audio_info(video_path)
+    if audio_info is None:
+        return None
+    sample_rate = audio_info[1]
+    chunk_samples = max(1, round(sample_rate / frame_rate))
+    chunk_runs = get_audio_chunk_runs(runs, Fraction(sample_rate) / frame_rate / chunk_samples)
+    return (
+        f"[{input_idx}:a]asetnsamples=n={chunk_samples}:p=0,aselect='{frame_select_expr(chunk_runs)}',"
+        f"asetpts=N/SR/TB[a]"
+    )
+
+def call_ffmpeg_graph(cmd_head, graph, working_path, cmd_tail, out_path):
+    """
+    Run cmd_head + the filter graph + cmd_tail, see call_ffmpeg
+
+    The graph grows with the number of runs, so it is passed as a script file.
+    """
+    graph_path = working_path + TEMP_PREFIX + "filter_graph.txt"
+    with open(graph_path, "w", encoding="utf-8") as f:
+        f.write(graph)
+    # some builds exit with 0 on an unknown option, so the output is checked as well
+    written = any(
+        call_ffmpeg(cmd_head + [script_opt, graph_path] + cmd_tail, out_path)
+        for script_opt in ("-/filter_complex", "-filter_complex_script")  # the latter before ffmpeg 7
+    )
+    os.remove(graph_path)
+    return written
+
+def filter_lazy_render(video_path, working_path, kept, frame_rate, crop_rect=None):
+    """
+    Render the kept frames of lazy mode to output.mp4 with a single ffmpeg filter graph
+
+    select keeps the video frames and the get_lazy_audio_graph chain their audio.
+    Nothing passes through Python and no segment files are written. Returns False if
+    ffmpeg could not write output.mp4, True also when no frame is kept and there is
+    nothing to write.
+    """
+    runs = get_lazy_runs(kept)
+    if not runs:
+        return True
+    crop = "," + get_crop_filter(crop_rect) if crop_rect is not None else ""
+    graph = f"[0:v]select='{frame_select_expr(runs)}'{crop},setpts=N/({frame_rate})/TB[v]"
+    cmd_tail = ["-map", "[v]"]
+    audio_graph = get_lazy_audio_graph(video_path, runs, frame_rate)
+    if audio_graph is not None:
+        graph += ";" + audio_graph
+        cmd_tail += ["-map", "[a]", "-c:a", "aac"]
+    out_path = working_path + "output.mp4"
+    cmd_tail += [
+        "-r", str(frame_rate), "-c:v", WRITER_ENCODER, "-preset", WRITER_PRESET, "-crf", str(WRITER_CRF), "-pix_fmt", "yuv420p",
+        out_path,
+    ]
+    return call_ffmpeg_graph(
+        ["ffmpeg", "-loglevel", "quiet", "-y", "-i", video_path], graph, working_path, cmd_tail, out_path
+    )
+
+def concat_lazy_output(working_path, workers, audio_path=None, audio_graph=None):
+    """
+    Join the files of the given workers into output.mp4, returns False if ffmpeg could
+    not write it. Workers that kept no frame are left out, a file without a stream
+    cannot start the concat.
+
+    With audio_graph, a get_lazy_audio_graph chain reading input 1, the audio of
+    audio_path is cut in the same ffmpeg process and added to the joined video.
+    """
+    with open(working_path + TEMP_FILENAME, "w") as f:
+        for thread_idx in workers:
+            f.write("file " + TEMP_PREFIX + str(thread_idx) + ".mp4" + "\n")
+
+    #cleanup below
+    out_path = working_path + "output.mp4"
+    cmd = ["ffmpeg", "-loglevel", "quiet", "-y", "-f", "concat", "-safe", "0", "-i", working_path + TEMP_FILENAME]
+    if audio_graph is None:
+        written = call_ffmpeg(cmd + ["-c", "copy", out_path], out_path)
+    else:
+        written = call_ffmpeg_graph(
+            cmd + ["-i", audio_path], audio_graph, working_path,
+            ["-map", "0:v", "-map", "[a]", "-c:v", "copy", "-c:a", "aac", out_path], out_path
+        )
+
+    os.remove(working_path + TEMP_FILENAME)
+    return written
+
+def normal_video_generate(
+    process_num, working_path, segments, cap, frame_rate, lgt, hgt, on_segment=None, crop_rect=None, video_y_n=None
+):
+    size = (lgt, hgt) 
+    start, end = segments[0][1], segments[-1][2]
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    pos = start
+    for index, seg_start, seg_end, vp in segments:
+        if video_y_n is None or video_y_n[index]:
+            cap.advance_to(seg_start)
+            out = open_cv_writer(
+                working_path + TEMP_PREFIX + str(index) + vp + ".mp4", frame_rate, size, crop_rect
+            )
+            for i in range(seg_start, seg_end):
+                ret, frame = cap.read()
+                out.write(frame)
+                print_progress(
+                    i,
+                    start,
+                    end - 1,
+                    "log_thread_generate_video_start",
+                    "log_thread_100_percent",
+                    process_num,
+                )
+            out.release()
+            # print("Thread " + str(process_num) + " generated file out_" + str(index) + vp + ".mp4")
+            pos = seg_end
+        if on_segment is not None:
+            on_segment(index)
+    if pos != end:
+        print_progress(end - 1, start, end - 1, "log_thread_generate_video_start", "log_thread_100_percent", process_num)
+    cap.release()
+
+def keeps_video(mode, suffix):
+    """Whether the video of a segment with this suffix survives the normal mode"""
+    return suffix != t("invalid_pause") or mode == 1  # Normal mode (keep invalid pause video)
+
+def encoder_video_generate(
+    process_num, working_path, segments, cap, frame_rate, lgt, hgt, on_segment=None, crop_rect=None, video_y_n=None
+):
+    """
+    normal_video_generate counterpart that pipes the segments into FrameEncoder processes,
+    letting the segment muxer cut them at every pause transition
+
+    The segments of one encoder process are only known to be closed when it exits, so
+    on_segment is called for them together. If the reader runs out of frames early (the
+    frame count of the container can be too high), the batch stops there and only the
+    segments that received frames are renamed.
+    """
+    start, end = segments[0][1], segments[-1][2]
+    kept = []
+    for segment in segments:
+        index = segment[0]
+        if video_y_n is None or video_y_n[index]:
+            kept.append(segment)
+        elif on_segment is not None:
+            on_segment(index)
+    # the segment muxer expands %d, so a literal % in the folder name is doubled
+    out_pattern = working_path.replace("%", "%%") + TEMP_PREFIX + "w" + str(process_num) + "_%d.mp4"
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    pos = start
+    for batch in range(0, len(kept), WRITER_MAX_SEGMENTS):
+        batch_segs = kept[batch:batch + WRITER_MAX_SEGMENTS]
+        seg_lengths = [seg_end - seg_start for _, seg_start, seg_end, _ in batch_segs]
+        seg_offsets = [0] + [int(offset) for offset in np.cumsum(seg_lengths[:-1])]
+        out = FrameEncoder(out_pattern, frame_rate, (lgt, hgt), seg_offsets, 0, crop_rect)
+        piped = 0  # frames actually written to the encoder
+        ret = True
+        for _, seg_start, seg_end, _ in batch_segs:
+            cap.advance_to(seg_start)
+            for i in range(seg_start, seg_end):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                out.write(frame)
+                piped += 1
+                print_progress(
+                    i,
+                    start,
+                    end - 1,
+                    "log_thread_generate_video_start",
+                    "log_thread_100_percent",
+                    process_num,
+                )
+            pos = seg_end
+            if not ret:
+                break  # the muxer cuts by frame count, later frames would land in the wrong segments
+        out.release()
+
+        # the segment muxer only numbers the files, give them the segment indices and suffixes
+        for seg_offset, (index, _, _, vp) in enumerate(batch_segs):
+            written_path = working_path + TEMP_PREFIX + "w" + str(process_num) + "_" + str(seg_offset) + ".mp4"
+            # a segment the reader had no frames for was never written
+            if seg_offsets[seg_offset] < piped and os.path.exists(written_path):
+                os.replace(written_path, working_path + TEMP_PREFIX + str(index) + vp + ".mp4")
+            if on_segment is not None:
+                on_segment(index)
+    if pos != end:
+        print_progress(end - 1, start, end - 1, "log_thread_generate_video_start", "log_thread_100_percent", process_num)
+    cap.release()
+
+def call_ffmpeg(cmd, out_path):
+    """Run an ffmpeg command writing out_path, returns whether it exited with 0 and out_path is not empty"""
+    if os.path.exists(out_path):
+        os.remove(out_path)  # never mistake an old file for the output
+    return subprocess.call(cmd) == 0 and os.path.isfile(out_path) and os.path.getsize(out_path) > 0
+
+def get_timescale_args(codec):
+    """mp4 muxer options giving the output the time base of the source"""
+    time_base = codec[4].partition("/")[2]
+    return ["-video_track_timescale", time_base] if time_base.isdigit() else []
+
+def get_render_args(codec, copy):
+    """
+    ffmpeg video output options of smart_render_range: stream copy, or the re-encode matching
+    the pix_fmt, profile and level of the source codec
+    """
+    if copy:
+        return ["-c:v", "copy"]
+    codec_name, pix_fmt, profile, level, time_base = codec
+    encoder = SMART_RENDER_ENCODERS.get(codec_name, SMART_RENDER_FALLBACK_ENCODER)
+    args = ["-c:v", encoder, "-preset", SMART_RENDER_PRESET, "-crf", str(SMART_RENDER_CRF), "-pix_fmt", pix_fmt]
+    if profile in SMART_RENDER_PROFILES.get(encoder, {}):
+        args += ["-profile:v", SMART_RENDER_PROFILES[encoder][profile]]
+    if encoder == "libx264" and level >= 10:
+        args += ["-level", f"{level / 10:g}"]  # ffprobe reports level 3.1 as 31
+    elif encoder == "libx265" and level >= 30:
+        args += ["-x265-params", f"level-idc={level / 30:g}"]  # and as 93 for HEVC
+    return args
+
+def render_part(video_path, start, end, out_path, frame_rate, codec, copy):
+    """Write frames start..end-1 to out_path, returns whether ffmpeg succeeded and wrote it"""
+    cmd = ["ffmpeg", "-loglevel", "quiet", "-y"]
+    if copy:
+        # copy seeks to the keyframe at or before the given time
+        cmd += ["-ss", frame_seconds(start + 0.25, frame_rate)]
+    elif start > 0:
+        cmd += ["-ss", frame_seconds(start - 0.5, frame_rate)]
+    cmd += ["-i", video_path] + get_render_args(codec, copy)
+    if not copy:
+        # the output starts at the first frame, not half a frame before it
+        cmd += ["-vf", "setpts=PTS-STARTPTS", "-r", str(frame_rate)]
+    cmd += ["-map", "0:v:0", "-frames:v", str(end - start), "-an", "-sn"]
+    if out_path.endswith(".mp4"):
+        cmd += get_timescale_args(codec)
+    return call_ffmpeg(cmd + [out_path], out_path)
+
+def smart_render_range(video_path, start, end, out_path, keyframes, frame_rate, codec):
+    """
+    Write frames start..end-1 of the video to out_path, stream-copying every whole GOP
+
+    Only the partial GOPs before the first and after the last keyframe inside the range
+    are re-encoded, with the encoder, profile and level matching the source. The parts
+    are written as MPEG-TS, which carries the codec headers in-band, and joined with the
+    concat demuxer. Sources whose codec has no entry in SMART_RENDER_ENCODERS, ranges
+    without a whole GOP and ranges where any ffmpeg step fails are re-encoded entirely.
+    Returns False if even that fails.
+    """
+    inner = keyframes[(keyframes >= start) & (keyframes <= end)] if codec[0] in SMART_RENDER_ENCODERS else []
+    if len(inner) >= 2:
+        if smart_copy_range(video_path, start, end, out_path, int(inner[0]), int(inner[-1]), frame_rate, codec):
+            return True
+        logger.warning(t("log_smart_render_fallback").format(os.path.basename(out_path)))
+    if render_part(video_path, start, end, out_path, frame_rate, codec, False):
+        return True
+    logger.error(t("log_segment_render_failed").format(os.path.basename(out_path)))
+    return False
+
+def smart_copy_range(video_path, start, end, out_path, first_key, last_key, frame_rate, codec):
+    """The stream copy of smart_render_range, returns False as soon as one ffmpeg step fails"""
+    parts = [(start, first_key, False), (first_key, last_key, True), (last_key, end, False)]
+    part_paths = []
+    list_path = out_path + ".txt"
+    try:
+        for part_idx, (part_start, part_end, copy) in enumerate(parts):
+            if part_end <= part_start:
+                continue
+            part_paths.append(out_path + "." + str(part_idx) + ".ts")
+            if not render_part(video_path, part_start, part_end, part_paths[-1], frame_rate, codec, copy):
+                return False
+        with open(list_path, "w", encoding="utf-8") as f:
+            for part_path in part_paths:
+                f.write("file '" + os.path.basename(part_path) + "'\n")
+        cmd = ["ffmpeg", "-loglevel", "quiet", "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy"]
+        return call_ffmpeg(cmd + get_timescale_args(codec) + [out_path], out_path)
+    finally:
+        for path in part_paths + [list_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+def smart_video_generate(
+    process_num, working_path, segments, video_path, frame_rate, keyframes, codec, on_segment=None, video_y_n=None
+):
+    """normal_video_generate counterpart that renders each segment with smart_render_range"""
+    start, end = segments[0][1], segments[-1][2]
+    print_progress(start, start, end - 1, "log_thread_generate_video_start", "log_thread_100_percent", process_num)
+    for index, seg_start, seg_end, vp in segments:
+        if video_y_n is None or video_y_n[index]:
+            smart_render_range(
+                video_path,
+                seg_start,
+                seg_end,
+                working_path + TEMP_PREFIX + str(index) + vp + ".mp4",
+                keyframes,
+                frame_rate,
+                codec,
+            )
+        if on_segment is not None:
+            on_segment(index)
+    print_progress(end - 1, start, end - 1, "log_thread_generate_video_start", "log_thread_100_percent", process_num)
+
+def get_audio_segment_end(seg_end, frame_cnt):
+    """
+    Frame the audio of a segment ending before seg_end is cut up to, in every audio path:
+    only the last segment of the video ends one frame early, wherever the workers split
+    """
+    return min(seg_end, frame_cnt - 1)
+
+def normal_audio_generate(process_num, working_path, segments, sound, frame_rate, frame_cnt, kept_y_n=None):
+    fps = float(frame_rate)
+    inc = 1 / fps * 1000
+
+    for index, start_seg, seg_end, vp in segments:
+        i = get_audio_segment_end(seg_end, frame_cnt)
+        if kept_y_n is None or kept_y_n[index]:
+            out_a = sound[start_seg * inc : i * inc + fps]
+            # print("start is ", start_seg * inc, ", end is ", i * inc + fps)
+            out_a.export(working_path + TEMP_PREFIX + str(index) + vp + ".mp3")
+        # print("Thread " + str(process_num) + " generated file out_" + str(index) + vp + ".mp3")
+
+def get_audio_segment_ext():
+    """Extension of the normal mode audio segments, AAC segments are muxed without re-encoding"""
+    return ".m4a" if AUDIO_BACKEND == "ffmpeg" else ".mp3"
+
+def ffmpeg_audio_generate(
+    process_num, working_path, segments, video_path, frame_rate, frame_cnt, audio_codec, kept_y_n=None
+):
+    """
+    normal_audio_generate counterpart that cuts every segment straight from the video
+    with ffmpeg, so the soundtrack is never decoded into memory as a whole
+
+    The segments are AAC in .m4a, stream-copied from AAC sources (the edit list keeps
+    the cut sample exact) and encoded once otherwise.
+    """
+    for index, seg_start, seg_end, vp in segments:
+        if kept_y_n is not None and not kept_y_n[index]:
+            continue
+        extract_audio_segment(
+            video_path,
+            seg_start,
+            get_audio_segment_end(seg_end, frame_cnt),
+            frame_rate,
+            audio_codec,
+            working_path + TEMP_PREFIX + str(index) + vp + ".m4a",
+        )
+
+def extract_audio_segment(video_path, seg_start, seg_end, frame_rate, audio_codec, out_path):
+    """
+    Cut the audio of frames seg_start..seg_end plus frame_rate ms from the video into an AAC file
+
+    Returns whether ffmpeg succeeded and wrote it. A failed cut leaves no file behind, so
+    the merge reports its segment among the failures.
+    """
+    codec_args = ["-c:a", "copy"] if AUDIO_STREAM_COPY and audio_codec == "aac" else ["-c:a", "aac"]
+    cmd = [
+        "ffmpeg", "-loglevel", "quiet", "-y",
+        "-ss", frame_seconds(seg_start, frame_rate), "-i", video_path,
+        "-t", f"{float((seg_end - seg_start) / frame_rate + frame_rate / 1000):.6f}",
+        "-map", "0:a:0", "-vn",
+    ]
+    if call_ffmpeg(cmd + codec_args + [out_path], out_path):
+        return True
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    logger.error(t("log_segment_render_failed").format(os.path.basename(out_path)))
+    return False
+
+def get_normal_manifest(prefix, segments, mode):
+    """(name, frames, label) of the output file every normal mode segment turns into"""
+    audio_ext = get_audio_segment_ext()
+    return [
+        (str(prefix + idx) + suffix + (".mp4" if keeps_video(mode, suffix) else audio_ext), end - start, suffix)
+        for idx, start, end, suffix in segments
+    ]
+
+def is_ignored(entry, ignore_frame_cnt):
+    """Whether a manifest entry is a video of at most ignore_frame_cnt frames, which is not kept"""
+    name, frames, label = entry
+    return name.lower().endswith(".mp4") and frames <= ignore_frame_cnt
+
+def mux_command(jobs, audio_codec):
+    """One ffmpeg command merging every (video, audio, out) job, each with its own output"""
+    cmd = ["ffmpeg", "-loglevel", "quiet", "-y"]
+    for video, audio, out in jobs:
+        cmd += ["-i", video, "-i", audio]
+    for k, (video, audio, out) in enumerate(jobs):
+        cmd += ["-map", f"{2 * k}:v:0", "-map", f"{2 * k + 1}:a:0", "-c:v", "copy", "-c:a", audio_codec, out]
+    return cmd
+
+def mux_segments(process_num, working_path, prefix, segments, has_sound, mode, process_counts, failures):
+    """
+    Turn the temp files of the given (index, suffix) segments into the numbered outputs
+
+    Video and audio are merged MUX_BATCH_SIZE segments per ffmpeg process. A batch that
+    fails is retried one segment per process, so a broken segment only loses itself.
+    Segments that need no merge are renamed. The number of ffmpeg processes started is
+    appended to process_counts, the names of the outputs that could not be written to
+    failures.
+    """
+    audio_ext = get_audio_segment_ext()
+    # mp3 segments are re-encoded for the mp4 container, AAC segments are copied
+    audio_codec = "aac" if audio_ext == ".mp3" else "copy"
+    logger.info(
+        t("log_thread_merge_audio_video_start" if has_sound else "log_thread_no_audio_rename").format(process_num)
+    )
+
+    jobs = get_mux_jobs(working_path, prefix, segments, has_sound, mode, audio_ext, failures)
+    process_cnt = 0
+    for batch_start in range(0, len(jobs), MUX_BATCH_SIZE):
+        process_cnt += run_mux_batch(jobs[batch_start:batch_start + MUX_BATCH_SIZE], audio_codec, failures)
+    process_counts.append(process_cnt)
+    logger.info(t("log_thread_100_percent").format(process_num))
+
+def get_mux_jobs(working_path, prefix, segments, has_sound, mode, audio_ext, failures):
+    """
+    Return the (video, audio, out) merge jobs of the given segments, renaming right away
+    the files of segments that need no merge. Segments whose temp files are missing
+    are appended to failures.
+    """
+    jobs = []
+    for idx, start, end, suffix in segments:
+        old_name = working_path + TEMP_PREFIX + str(idx) + suffix
+        new_name = working_path + str(prefix + idx) + suffix
+        keep_video = keeps_video(mode, suffix)
+        if has_sound and keep_video:
+            video, audio = old_name + ".mp4", old_name + audio_ext
+            if os.path.exists(video) and os.path.exists(audio):
+                jobs.append((video, audio, new_name + ".mp4"))
+            else:
+                failures.append(os.path.basename(new_name + ".mp4"))
+        elif has_sound or keep_video:
+            ext = audio_ext if has_sound else ".mp4"
+            if os.path.exists(old_name + ext):
+                os.replace(old_name + ext, new_name + ext)
+            else:
+                failures.append(os.path.basename(new_name + ext))
+    return jobs
+
+def mux_batch_succeeded(batch, audio_codec):
+    """Merge the jobs in one ffmpeg process, returns whether it exited with 0 and wrote every output"""
+    for video, audio, out in batch:
+        if os.path.exists(out):
+            os.remove(out)  # never mistake an old file for the output
+    return subprocess.call(mux_command(batch, audio_codec)) == 0 and all(os.path.exists(out) for _, _, out in batch)
+
+def run_mux_batch(batch, audio_codec, failures):
+    """
+    Merge a batch of jobs in one ffmpeg process, one process per job if that fails. The
+    outputs that still fail are appended to failures. Returns the process count.
+    """
+    if mux_batch_succeeded(batch, audio_codec):
+        return 1
+    if len(batch) == 1:
+        failures.append(os.path.basename(batch[0][2]))
+        return 1
+    for job in batch:
+        if not mux_batch_succeeded([job], audio_codec):
+            failures.append(os.path.basename(job[2]))
+    return 1 + len(batch)
+
+def get_video_thread(
+    thread_idx, working_path, segments, video_path, frame_rate, lgt, hgt, keyframes, codec, on_segment=None, crop_rect=None,
+    video_y_n=None
+):
+    """
+    Thread generating one worker's normal mode segments with the configured backend,
+    codec is None unless the smart render is used. Segments whose video_y_n entry
+    is False are not rendered, on_segment is still called for them.
+    """
+    if codec is not None:
+        return threading.Thread(
+            target=smart_video_generate,
+            args=(
+                thread_idx, working_path, segments, video_path, frame_rate, keyframes, codec, on_segment, video_y_n
+            )
+        )
+    cap_t = FrameSource(cv2.VideoCapture(video_path), keyframes)
+    return threading.Thread(
+        target=encoder_video_generate if WRITER_BACKEND == "ffmpeg" else normal_video_generate,
+        args=(thread_idx, working_path, segments, cap_t, frame_rate, lgt, hgt, on_segment, crop_rect, video_y_n)
+    )
+
+def normal_pipeline(
+    video_path, working_path, mode, frame_rate, lgt, hgt, keyframes, codec, worker_segments, segments, prefix,
+    frame_cnt, thread_num, video_y_n, kept_y_n, failures, crop_rect=None
+):
+    """
+    Generate the video of, cut the audio of and merge the normal mode segments as one pipeline
+
+    The video workers hand every closed segment to the audio pool, which hands it on to the
+    mux pool, through bounded queues. The merge of early segments overlaps with the
+    rendering of later ones instead of waiting for every phase to finish. Segments whose
+    kept_y_n entry is False are dropped by the audio pool. Outputs that could not be
+    written are appended to failures.
+    """
+    audio_info = get_audio_info(video_path)
+    has_sound = audio_info is not None
+    audio_ext = get_audio_segment_ext()
+    audio_q = queue.Queue(PIPELINE_QUEUE_SIZE)
+    mux_q = queue.Queue(PIPELINE_QUEUE_SIZE)
+    process_counts = []
+
+    def audio_worker():
+        while True:
+            idx = audio_q.get()
+            if idx is None:
+                return
+            if not kept_y_n[idx]:
+                continue
+            _, start, end, suffix = segments[idx]
+            if has_sound:
+                extract_audio_segment(
+                    video_path,
+                    start,
+                    get_audio_segment_end(end, frame_cnt),
+                    frame_rate,
+                    audio_info[0],
+                    working_path + TEMP_PREFIX + str(idx) + suffix + audio_ext,
+                )
+            mux_q.put(idx)
+
+    def mux_worker():
+        process_cnt = 0
+        done = False
+        while not done:
+            # merge whatever is ready in one process, up to MUX_BATCH_SIZE segments
+            batch = [mux_q.get()]
+            while batch[-1] is not None and len(batch) < MUX_BATCH_SIZE:
+                try:
+                    batch.append(mux_q.get_nowait())
+                except queue.Empty:
+                    break
+            done = batch[-1] is None
+            jobs = get_mux_jobs(
+                working_path, prefix, [segments[idx] for idx in batch if idx is not None], has_sound, mode, audio_ext,
+                failures
+            )
+            if jobs:
+                process_cnt += run_mux_batch(jobs, "copy", failures)
+        process_counts.append(process_cnt)
+
+    audio_threads = [threading.Thread(target=audio_worker) for _ in range(thread_num)]
+    mux_threads = [threading.Thread(target=mux_worker) for _ in range(thread_num)]
+    for thread in audio_threads + mux_threads:
+        thread.start()
+
+    video_threads = []
+    for thread_idx, thread_segments in enumerate(worker_segments):
+        thread = get_video_thread(
+            thread_idx, working_path, thread_segments, video_path, frame_rate, lgt, hgt, keyframes, codec, audio_q.put,
+            crop_rect, video_y_n
+        )
+        video_threads.append(thread)
+        thread.start()
+
+    # each stage is told to stop once the stage before it has finished
+    for thread in video_threads:
+        thread.join()
+    for _ in audio_threads:
+        audio_q.put(None)
+    for thread in audio_threads:
+        thread.join()
+    for _ in mux_threads:
+        mux_q.put(None)
+    for thread in mux_threads:
+        thread.join()
+
+    logger.info(t("log_mux_process_count").format(int(np.count_nonzero(kept_y_n)), sum(process_counts)))
+
+def normal_version(job):
+    video_path, mode, thread_num, ignore_frame_cnt = job.video_path, job.mode, job.thread_num, job.ignore_frame_cnt
+    working_path = os.path.join(job.working_path, "")
+    _, lgt, hgt, frame_cnt = get_video_info(video_path)
+    frame_rate = job.frame_rate
+
+    start_f = int(job.start_second * frame_rate)  # start frame (will keep frames before this)
+    end_f = min(int(job.end_second * frame_rate), frame_cnt - 1)  # end frame   (will keep frames after this)
+
+    pc, crop_rect = get_job_geometry(job, lgt, hgt)
+
+    pause_y_n = np.full(frame_cnt, False)  # True means a pause, False means not a pause
+    vp_y_n = np.full(frame_cnt, False)
+    keep_frame_y_n = np.full(frame_cnt, False)  # only used by lazy mode, filled in for the shared cache
+
+    tc = TimeCost()
+
+    tc.time_start(t("log_timing_analyzing_pauses"))
+
+    keyframes = get_keyframes(video_path, frame_rate)
+    keep_frame_y_n[:start_f] = True
+    keep_frame_y_n[end_f + 1:] = True
+    run_analysis(
+        pause_analyze,
+        video_path,
+        pc,
+        frame_rate,
+        lgt,
+        hgt,
+        start_f,
+        end_f,
+        partition_frames(start_f, end_f, thread_num, keyframes),
+        pause_y_n,
+        vp_y_n,
+        keep_frame_y_n,
+    )
+
+    timeline = PauseTimeline.from_flags(pause_y_n, vp_y_n).expand_valid_pauses()
+    
+    tc.time_end()
+
+    pipelined = NORMAL_PIPELINE and AUDIO_BACKEND == "ffmpeg"
+    tc.time_start(t("log_timing_segment_pipeline" if pipelined else "log_timing_generating_video_segments"))
+
+    worker_segments = timeline.split(partition_frames(0, frame_cnt - 1, thread_num, keyframes))
+    
+    threads = []
+    # whole GOPs cannot be stream-copied through a crop
+    codec = get_video_codec(video_path) if RENDER_BACKEND == "smart" and crop_rect is None else None
+    segments = timeline.segments()
+    prefix = pow(10, len(str(len(segments))))
+    # short videos are never written, rather than written and deleted again
+    manifest = get_normal_manifest(prefix, segments, mode)
+    kept_y_n = np.array([not is_ignored(entry, ignore_frame_cnt) for entry in manifest])
+    video_y_n = kept_y_n & np.array([keeps_video(mode, suffix) for _, _, _, suffix in segments])
+    failures = []  # outputs that could not be written
+
+    if pipelined:
+        normal_pipeline(
+            video_path, working_path, mode, frame_rate, lgt, hgt, keyframes, codec, worker_segments, segments, prefix,
+            frame_cnt, thread_num, video_y_n, kept_y_n, failures, crop_rect
+        )
+        tc.time_end()
+        cleanup(working_path, manifest, ignore_frame_cnt)
+        check_failures(failures)
+        return
+
+    for thread_idx, thread_segments in enumerate(worker_segments):
+        thread = get_video_thread(
+            thread_idx, working_path, thread_segments, video_path, frame_rate, lgt, hgt, keyframes, codec,
+            crop_rect=crop_rect, video_y_n=video_y_n
+        )
+        threads.append(thread)
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    tc.time_end()
+
+    if AUDIO_BACKEND == "ffmpeg":
+        audio_info = get_audio_info(video_path)
+        has_sound = audio_info is not None
+    else:
+        has_sound = True
+        try:
+            sound = AudioSegment.from_file(
+                video_path, format=os.path.splitext(video_path)[1].lstrip('.')
+            )
+        except:
+            has_sound = False
+
+    if has_sound:
+        tc.time_start(t("log_timing_generating_audio_segments"))
+
+        threads = []
+
+        for thread_idx, thread_segments in enumerate(worker_segments):
+            if AUDIO_BACKEND == "ffmpeg":
+                thread = threading.Thread(
+                    target=ffmpeg_audio_generate,
+                    args=(
+                        thread_idx, working_path, thread_segments, video_path, frame_rate, frame_cnt, audio_info[0],
+                        kept_y_n
+                    )
+                )
+            else:
+                thread = threading.Thread(
+                    target=normal_audio_generate,
+                    args=(thread_idx, working_path, thread_segments, sound, frame_rate, frame_cnt, kept_y_n)
+                )
+            threads.append(thread)
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        tc.time_end()
+
+    tc.time_start(t("log_timing_merging_video_audio"))
+
+    threads = []
+    process_counts = []
+    kept_segments = [segment for segment in segments if kept_y_n[segment[0]]]
+
+    for thread_idx, (first, last) in enumerate(partition_frames(0, len(kept_segments) - 1, thread_num)):
+        thread = threading.Thread(
+            target=mux_segments,
+            args=(
+                thread_idx, working_path, prefix, kept_segments[first:last + 1], has_sound, mode, process_counts,
+                failures
+            )
+        )
+
+        threads.append(thread)
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    logger.info(t("log_mux_process_count").format(len(kept_segments), sum(process_counts)))
+
+    tc.time_end()
+
+    cleanup(working_path, manifest, ignore_frame_cnt)
+    check_failures(failures)
+
+def check_failures(failures):
+    """Fail the job, after the cleanup, if any output could not be written"""
+    if failures:
+        raise RuntimeError(t("segments_failed").format(len(failures), ", ".join(sorted(failures))))
+
+def read_detection_points(file_path):
+    """
+    Read the manually set detection points saved by the GUI
+
+    Returns (array_1, array_2) as lists of [y, x] pairs, the 4 valid pause points of
+    array_2 share one saved y.
+    """
+    array_1 = []
+    array_2 = []
+    with open(file_path) as f:
+        for i in range(4):
+            array_1.append([int(f.readline()), int(f.readline())])
+        for i in range(4):
+            array_2.append([int(f.readline()), int(f.readline())])
+        valid_pause_y = int(f.readline())
+        for i in range(4):
+            array_2.append([valid_pause_y, int(f.readline())])
+    return array_1, array_2
+
+def get_job_error(job):
+    """
+    Check a job like the GUI checks its entries, before anything is written
+
+    Returns the i18n key of the first problem found, or None if the job can run.
+    """
+    if not os.path.isfile(job.video_path):
+        return "input_not_found"
+    fps, lgt, hgt, frame_cnt = get_video_info(job.video_path)
+    if int(fps) <= 0 or frame_cnt <= 0:
+        return "input_unreadable"
+    if not 1 <= job.thread_num <= MAX_THREAD_NUM:
+        return "thread_num_error"
+    if job.ignore_frame_cnt < 0:
+        return "ignore_frame_error"
+    if job.start_second < 0 or job.start_second >= job.end_second:
+        return "end_must_be_greater"
+    if frame_cnt / (job.frame_rate or get_frame_rate(job.video_path)) <= job.end_second:
+        return "end_exceeds_video"
+    margins = (job.top_margin, job.bottom_margin, job.left_margin, job.right_margin)
+    if max(margins) > MARGIN_TH:
+        return "margin_too_large"
+    if job.crop and min(margins) < 0:
+        return "negative_margin_error"
+    if job.detection_points is not None and [len(points) for points in job.detection_points] != [4, 8]:
+        return "no_detection_points"
+    # cleanup removes every TEMP_PREFIX file of the working folder
+    if os.path.basename(job.video_path).startswith(TEMP_PREFIX) and os.path.normcase(
+        os.path.abspath(os.path.dirname(job.video_path))
+    ) == os.path.normcase(os.path.abspath(job.working_path)):
+        return "no_out_prefix"
+    return None
+
+def run_job(job):
+    """Run one JobConfig, the headless counterpart of the cut buttons"""
+    tc = TimeCost()
+    tc.time_start(t("log_timing_full_process"))
+    # Get translated mode name for display
+    mode_names = [t("mode_normal_audio_only"), t("mode_normal_keep_video"), t("mode_lazy_keep_valid"), t("mode_lazy_cut_all")]
+    logger.info(mode_names[job.mode] + " " + t("log_started"))
+    if job.frame_rate is None:
+        job = job._replace(frame_rate=get_frame_rate(job.video_path))
+    if job.mode in [2, 3]:  # Lazy mode indices
+        lazy_version(job)
+        logger.info(t("log_lazy_complete"))
+    else:  # normal mode otherwise
+        normal_version(job)
+        logger.info(t("log_normal_complete"))
+    tc.time_end()
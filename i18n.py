@@ -92,6 +92,10 @@ TRANSLATIONS = {
         "frame_read_failed": "画面读取失败",
         "not_4_points": "未设置4个点请重新设置",
         "not_8_points": "未设置8个点请重新设置",
+        "input_not_found": "找不到输入视频",
+        "segments_failed": "{}个片段未能生成：{}",
+        "input_unreadable": "无法读取输入视频",
+        "ffmpeg_not_found": "找不到FFmpeg，请运行setup.bat或将其加入PATH",
         # Info messages
         "info_title": "消息",
         "margin_filled": "边距已填充",
@@ -99,6 +103,7 @@ TRANSLATIONS = {
         "detection_points_saved": "检测点坐标已保存",
         "warning_title": "注意",
         "fps_warning": "视频帧数为非整数，可能会有剪辑问题，推荐使用其他软件重新导出为整数帧文件，点击确定或关闭窗口以继续",
+        "fps_warning_cli": "视频帧率为非整数（{}，约{:.3f}），将按精确帧率换算时间，推荐重新导出为整数帧率文件",
         "click_4_points": "请参考示例图1按顺序点击以下4个点（红叉中心位置）：\n第一个点请点击右上角1倍速X正下方的三角形白色区域\n第二个点请点击右上角1倍速1正下方的灰色区域\n第三个点请点击右上角暂停正中的灰色区域\n第四个点请点击右上角暂停靠左的白色区域",
         "click_8_points": "请参考示例图2按顺序点击以下8个点（红叉中心位置）：\n第一个点请点击中间P字母的T型连接处\n第二个点请点击中间U字母中间的灰色区域\n第三个点请点击中间U字母靠下的白色区域\n第四个点请点击中间E字母的T型连接处靠上的白色区域\n第五至第八个点请点击左侧技能二字上方的灰色条状（纵坐标必须与灰色条状持平 横坐标比较平均的点上就可以）",
         # File suffixes (internal use)
@@ -121,6 +126,12 @@ TRANSLATIONS = {
         "log_thread_generate_video_start": "线程{}：开始生成视频片段",
         "log_thread_merge_audio_video_start": "线程{}：开始合并音频视频片段",
         "log_thread_no_audio_rename": "线程{}：视频未检测出音频，仅重命名",
+        "log_thread_coarse_stats": "线程{}：粗略搜索共分析 {} / {} 帧",
+        "log_analysis_cache_hit": "使用已缓存的暂停分析结果",
+        "log_lazy_stream_fallback": "暂停片段过长，改为先分析后生成",
+        "log_mux_process_count": "合并{}个片段共启动{}个ffmpeg进程",
+        "log_frame_source_stats": "解码{}帧，跳过{}帧未转换，定位{}次",
+        "log_crop_chunk_timing": "裁剪分块{}/{}（{}帧）用时 {}",
         "log_timing_cropping": "裁剪",
         "log_timing_full_process": "全流程",
         "log_timing_cleaning_segments": "清理片段",
@@ -128,7 +139,14 @@ TRANSLATIONS = {
         "log_timing_generating_video": "生成视频",
         "log_timing_generating_video_segments": "生成视频片段",
         "log_timing_generating_audio_segments": "生成音频片段",
+        "log_timing_segment_pipeline": "生成并合并片段",
         "log_timing_merging_video_audio": "合并视频音频",
+        "log_watch_started": "正在监视 {}（{}）",
+        "log_watch_polling_fallback": "无法使用inotify，改为每{}秒扫描一次",
+        "log_watch_job_done": "{} 已完成，已移动至 {}",
+        "log_watch_job_failed": "{} 失败，已移动至 {}",
+        "log_smart_render_fallback": "{} 无法直接复制，改为整段重新编码",
+        "log_segment_render_failed": "{} 生成失败",
     },
     "ja": {
         "window_title": "アークナイツ 自動分離/ポーズカット",
@@ -210,6 +228,10 @@ TRANSLATIONS = {
         "frame_read_failed": "フレームの読み取りに失敗しました",
         "not_4_points": "4つのポイントがすべて設定されていません。再設定してください",
         "not_8_points": "8つのポイントがすべて設定されていません。再設定してください",
+        "input_not_found": "入力動画が見つかりません",
+        "segments_failed": "{}個のセグメントを書き出せませんでした：{}",
+        "input_unreadable": "入力動画を読み込めません",
+        "ffmpeg_not_found": "FFmpegが見つかりません。setup.batを実行するか、PATHに追加してください",
         # Info messages
         "info_title": "メッセージ",
         "margin_filled": "余白が入力されました",
@@ -217,6 +239,7 @@ TRANSLATIONS = {
         "detection_points_saved": "検出点の座標が保存されました",
         "warning_title": "注意",
         "fps_warning": "動画のフレームレートが整数ではありません。編集の問題が発生する可能性があります。他のソフトウェアを使用して整数フレームレートのファイルとして再エクスポートすることをお勧めします。OKをクリックするかウィンドウを閉じて続行してください",
+        "fps_warning_cli": "動画のフレームレートが整数ではありません（{}、約{:.3f}）。正確なフレームレートで時間を換算します。整数フレームレートでの再エクスポートをお勧めします",
         "click_4_points": "サンプル画像1を参照して、順番に以下の4つのポイントをクリックしてください（赤い×マークの中心位置）：\n\nポイント1：右上の1倍速Xのすぐ下にある三角形の白い領域をクリック\nポイント2：右上の1倍速1のすぐ下にある灰色の領域をクリック\nポイント3：右上の一時停止アイコンの中央にある灰色の領域をクリック\nポイント4：右上の一時停止アイコンの左側にある白い領域をクリック",
         "click_8_points": "サンプル画像2を参照して、順番に以下の8つのポイントをクリックしてください（赤い×マークの中心位置）：\n\nポイント1：中央のP文字のT型接続部をクリック\nポイント2：中央のU文字の中央にある灰色の領域をクリック\nポイント3：中央のU文字の下にある白い領域をクリック\nポイント4：中央のE文字のT型接続部の上にある白い領域をクリック\nポイント5〜8：左側の「スキル」の上にある灰色のバーをクリック（縦座標は灰色のバーと同じ、横座標は均等に配置されたポイント）",
         # File suffixes (internal use)
@@ -239,6 +262,12 @@ TRANSLATIONS = {
         "log_thread_generate_video_start": "スレッド{}：動画セグメントの生成を開始",
         "log_thread_merge_audio_video_start": "スレッド{}：音声と動画セグメントの結合を開始",
         "log_thread_no_audio_rename": "スレッド{}：動画で音声が検出されなかったため、名前の変更のみ",
+        "log_thread_coarse_stats": "スレッド{}：粗密探索で {} / {} フレームを分析",
+        "log_analysis_cache_hit": "キャッシュされたポーズ分析結果を使用",
+        "log_lazy_stream_fallback": "ポーズ区間が長すぎるため、分析と生成を分けて実行します",
+        "log_mux_process_count": "{}個のセグメントの結合に{}個のffmpegプロセスを起動しました",
+        "log_frame_source_stats": "{}フレームをデコード、{}フレームを変換せずにスキップ、シーク{}回",
+        "log_crop_chunk_timing": "クロップチャンク{}/{}（{}フレーム）所要時間 {}",
         "log_timing_cropping": "クロップ",
         "log_timing_full_process": "フルプロセス",
         "log_timing_cleaning_segments": "セグメントのクリーンアップ",
@@ -246,7 +275,14 @@ TRANSLATIONS = {
         "log_timing_generating_video": "動画の生成",
         "log_timing_generating_video_segments": "動画セグメントの生成",
         "log_timing_generating_audio_segments": "音声セグメントの生成",
+        "log_timing_segment_pipeline": "セグメントの生成と結合",
         "log_timing_merging_video_audio": "動画と音声の結合",
+        "log_watch_started": "{} を監視中（{}）",
+        "log_watch_polling_fallback": "inotifyが使えないため、{}秒ごとにスキャンします",
+        "log_watch_job_done": "{} が完了し、{} に移動しました",
+        "log_watch_job_failed": "{} が失敗し、{} に移動しました",
+        "log_smart_render_fallback": "{} をストリームコピーできないため、全体を再エンコードします",
+        "log_segment_render_failed": "{} の生成に失敗しました",
     },
     "en": {
         "window_title": "Arknights Auto Separate/Cut Pause",
@@ -328,6 +364,10 @@ TRANSLATIONS = {
         "frame_read_failed": "Failed to read frame",
         "not_4_points": "Not all 4 points set, please reset",
         "not_8_points": "Not all 8 points set, please reset",
+        "input_not_found": "Input video not found",
+        "segments_failed": "{} segments could not be written: {}",
+        "input_unreadable": "Input video cannot be read",
+        "ffmpeg_not_found": "FFmpeg not found, please run setup.bat or add it to PATH",
         # Info messages
         "info_title": "Message",
         "margin_filled": "Margins filled",
@@ -335,6 +375,7 @@ TRANSLATIONS = {
         "detection_points_saved": "Detection point coordinates saved",
         "warning_title": "Notice",
         "fps_warning": "Video has non-integer FPS, there may be editing issues. It's recommended to re-export as integer FPS file using other software. Click OK or close window to continue",
+        "fps_warning_cli": "Video has a non-integer frame rate ({}, about {:.3f}), times are converted at the exact rate. Re-exporting at an integer frame rate is recommended",
         "click_4_points": "Please refer to sample image 1 and click these 4 points in order (center of red X markers):\n\nPoint 1: Click the triangular white area directly below the 1x speed X in the top right corner\nPoint 2: Click the gray area directly below the 1x speed 1 in the top right corner\nPoint 3: Click the gray area in the center of the pause icon in the top right corner\nPoint 4: Click the white area on the left side of the pause icon in the top right corner",
         "click_8_points": "Please refer to sample image 2 and click these 8 points in order (center of red X markers):\n\nPoint 1: Click the T-shaped connection of the P letter in the center\nPoint 2: Click the gray area in the middle of the U letter in the center\nPoint 3: Click the white area below the U letter in the center\nPoint 4: Click the white area above the T-shaped connection of the E letter in the center\nPoints 5-8: Click the gray bar above 'Skill' (技能) on the left side (vertical coordinate must align with gray bar, horizontal coordinate should be evenly distributed points)",
         # File suffixes (internal use)
@@ -357,6 +398,12 @@ TRANSLATIONS = {
         "log_thread_generate_video_start": "Thread {}: Starting to generate video segments",
         "log_thread_merge_audio_video_start": "Thread {}: Starting to merge audio and video segments",
         "log_thread_no_audio_rename": "Thread {}: No audio detected in video, renaming only",
+        "log_thread_coarse_stats": "Thread {}: Coarse search classified {} of {} frames",
+        "log_analysis_cache_hit": "Using cached pause analysis",
+        "log_lazy_stream_fallback": "Pause run too long to buffer, falling back to separate analysis and generation",
+        "log_mux_process_count": "Merged {} segments with {} ffmpeg processes",
+        "log_frame_source_stats": "Decoded {} frames, skipped {} frames without conversion, {} seeks",
+        "log_crop_chunk_timing": "Crop chunk {}/{} ({} frames) took {}",
         "log_timing_cropping": "Cropping",
         "log_timing_full_process": "Full process",
         "log_timing_cleaning_segments": "Cleaning segments",
@@ -364,7 +411,14 @@ TRANSLATIONS = {
         "log_timing_generating_video": "Generating video",
         "log_timing_generating_video_segments": "Generating video segments",
         "log_timing_generating_audio_segments": "Generating audio segments",
+        "log_timing_segment_pipeline": "Generating and merging segments",
         "log_timing_merging_video_audio": "Merging video and audio",
+        "log_watch_started": "Watching {} ({})",
+        "log_watch_polling_fallback": "inotify unavailable, scanning every {} seconds",
+        "log_watch_job_done": "{} done, moved to {}",
+        "log_watch_job_failed": "{} failed, moved to {}",
+        "log_smart_render_fallback": "{} could not be stream-copied, re-encoding it entirely",
+        "log_segment_render_failed": "{} could not be rendered",
     }
 }
 
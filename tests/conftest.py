@@ -0,0 +1,95 @@
+"""
+Shared fixtures: short test videos whose frames carry their own index
+
+Every frame paints the bits of its index as black or white blocks along the top edge,
+so a test can tell which frame a reader or a render returned. Tests using the videos
+are skipped when ffmpeg is not on PATH.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WIDTH = 320
+HEIGHT = 240
+INDEX_BITS = 12
+BLOCK_SIZE = 24              # side of the block of one index bit
+
+
+def index_frame(k):
+    """BGR frame showing the bits of k"""
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for bit in range(INDEX_BITS):
+        if k >> bit & 1:
+            frame[:BLOCK_SIZE, bit * BLOCK_SIZE:(bit + 1) * BLOCK_SIZE] = 255
+    return frame
+
+
+def index_probe_points():
+    """(ys, xs) of the block centres, in bit order"""
+    ys = np.full(INDEX_BITS, BLOCK_SIZE // 2, dtype=np.intp)
+    xs = np.array([bit * BLOCK_SIZE + BLOCK_SIZE // 2 for bit in range(INDEX_BITS)], dtype=np.intp)
+    return ys, xs
+
+
+def index_detection_points():
+    """
+    Manual detection points (see PointCoordinates) on the index blocks, so the pause,
+    1x speed and valid pause labels change along the video in runs of a few frames
+    """
+    def block(bit):
+        return [BLOCK_SIZE // 2, bit * BLOCK_SIZE + BLOCK_SIZE // 2]
+
+    # acc_r, acc_l, p_m, p_l
+    array_1 = [block(6), block(7), block(4), block(5)]
+    # m_p_l, m_p_m_2, m_p_m, m_p_r, then the valid pause row
+    array_2 = [block(8), block(9), block(8), block(8)] + [block(3), block(2), block(1), block(0)]
+    return array_1, array_2
+
+
+def read_index(frame, probe_points=None):
+    """The index painted on a frame, or on a strip indexed by probe_points"""
+    ys, xs = probe_points if probe_points is not None else index_probe_points()
+    bits = frame[ys, xs].mean(axis=1) > 128
+    return sum(int(bit) << k for k, bit in enumerate(bits))
+
+
+@pytest.fixture(scope="session")
+def make_video(tmp_path_factory):
+    """
+    Factory writing an index video: make_video(frame_cnt, rate="30000/1001", audio=True, gop=48)
+
+    The audio is a sine tone. Videos are cached per argument set for the session.
+    """
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        pytest.skip("ffmpeg not found")
+    folder = tmp_path_factory.mktemp("videos")
+    made = {}
+
+    def make(frame_cnt, rate="30000/1001", audio=True, gop=48):
+        key = (frame_cnt, rate, audio, gop)
+        if key in made:
+            return made[key]
+        path = str(folder / ("index_" + "_".join(str(part).replace("/", "-") for part in key) + ".mp4"))
+        cmd = [
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{WIDTH}x{HEIGHT}", "-r", rate, "-i", "-",
+        ]
+        if audio:
+            cmd += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000", "-shortest", "-c:a", "aac"]
+        cmd += ["-c:v", "libx264", "-g", str(gop), "-pix_fmt", "yuv420p", path]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        for k in range(frame_cnt):
+            proc.stdin.write(index_frame(k).tobytes())
+        proc.stdin.close()
+        assert proc.wait() == 0
+        made[key] = path
+        return path
+
+    return make
@@ -0,0 +1,111 @@
+"""The parallel analysis backends against a sequential single worker analysis"""
+
+import cv2
+import numpy as np
+import pytest
+
+import engine
+from conftest import index_detection_points
+
+
+def analyze(video_path, parts, monkeypatch, backend, input_kind):
+    """pause, valid pause and keep flags of the whole video, split into parts worker ranges"""
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", backend)
+    monkeypatch.setattr(engine, "ANALYSIS_INPUT", input_kind)
+    fps, lgt, hgt, frame_cnt = engine.get_video_info(video_path)
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(lgt, hgt, 0, 0, 0, 0, index_detection_points())
+    flags = [np.full(frame_cnt, False) for _ in range(3)]
+    frame_rate = engine.get_frame_rate(video_path)
+    ranges = engine.partition_frames(0, frame_cnt - 1, parts, engine.get_keyframes(video_path, frame_rate))
+    engine.run_analysis(
+        engine.pause_analyze, video_path, pc, frame_rate, lgt, hgt, 0, frame_cnt - 1, ranges, *flags
+    )
+    return flags
+
+
+def classify_every_frame(video_path):
+    """pause flags of a plain frame by frame decode"""
+    fps, lgt, hgt, frame_cnt = engine.get_video_info(video_path)
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(lgt, hgt, 0, 0, 0, 0, index_detection_points())
+    probe_points = engine.get_probe_points(pc)
+    cap = cv2.VideoCapture(video_path)
+    pause = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        pause.append(engine.classify_frames(frame, probe_points)[0][0])
+    cap.release()
+    return np.array(pause)
+
+
+@pytest.mark.parametrize("rate", ["30000/1001", "30"])
+@pytest.mark.parametrize("backend, input_kind", [("process", "strip"), ("thread", "strip"), ("process", "capture")])
+def test_parallel_analysis_matches_sequential(make_video, monkeypatch, rate, backend, input_kind):
+    video_path = make_video(900, rate)
+    sequential = analyze(video_path, 1, monkeypatch, "thread", "capture")
+    parallel = analyze(video_path, 4, monkeypatch, backend, input_kind)
+    assert np.any(sequential[0]) and not np.all(sequential[0])
+    for expected, actual in zip(sequential, parallel):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_sequential_analysis_matches_frame_by_frame_decode(make_video, monkeypatch):
+    video_path = make_video(900)
+    pause_y_n, vp_y_n, keep_frame_y_n = analyze(video_path, 1, monkeypatch, "thread", "capture")
+    np.testing.assert_array_equal(pause_y_n, classify_every_frame(video_path))
+    assert not np.any(vp_y_n & ~pause_y_n)
+
+
+@pytest.mark.parametrize("stride", [2, 4, 8, 30])
+def test_coarse_classify_matches_full_classification(make_video, stride):
+    video_path = make_video(900)
+    fps, lgt, hgt, frame_cnt = engine.get_video_info(video_path)
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(lgt, hgt, 0, 0, 0, 0, index_detection_points())
+    probe_points = engine.get_probe_points(pc)
+    cap = cv2.VideoCapture(video_path)
+    frames = [cap.read()[1] for _ in range(frame_cnt)]
+    cap.release()
+    expected = engine.classify_frames(np.array(frames), probe_points)
+    cap = engine.FrameSource(
+        cv2.VideoCapture(video_path), engine.get_keyframes(video_path, engine.get_frame_rate(video_path))
+    )
+    *actual, classified_cnt = engine.coarse_classify(cap, 0, frame_cnt - 1, probe_points, stride)
+    cap.release()
+    for expected_flags, actual_flags in zip(expected, actual):
+        np.testing.assert_array_equal(actual_flags, expected_flags)
+    assert classified_cnt < frame_cnt
+
+
+def test_coarse_analysis_matches_sequential(make_video, monkeypatch):
+    video_path = make_video(900)
+    sequential = analyze(video_path, 1, monkeypatch, "thread", "capture")
+    monkeypatch.setattr(engine, "ANALYSIS_STRIDE", 8)
+    coarse = analyze(video_path, 4, monkeypatch, "process", "strip")
+    for expected, actual in zip(sequential, coarse):
+        np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("name", engine.ANALYSIS_SETTING_NAMES)
+def test_analysis_cache_key_covers_every_setting(make_video, monkeypatch, name):
+    video_path = make_video(120)
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(320, 240, 0, 0, 0, 0, index_detection_points())
+    before = engine.get_analysis_cache_path(engine.pause_analyze, video_path, pc, 0, 119, 120)
+    monkeypatch.setattr(engine, name, ("changed", getattr(engine, name)))
+    assert engine.get_analysis_cache_path(engine.pause_analyze, video_path, pc, 0, 119, 120) != before
+
+
+@pytest.mark.parametrize("name, value", [("ANALYSIS_BACKEND", "thread"), ("ANALYSIS_INPUT", "capture")])
+def test_analysis_cache_key_ignores_settings_giving_the_same_flags(make_video, monkeypatch, name, value):
+    # test_parallel_analysis_matches_sequential checks that the flags are the same
+    video_path = make_video(120)
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(320, 240, 0, 0, 0, 0, index_detection_points())
+    before = engine.get_analysis_cache_path(engine.pause_analyze, video_path, pc, 0, 119, 120)
+    monkeypatch.setattr(engine, name, value)
+    assert engine.get_analysis_cache_path(engine.pause_analyze, video_path, pc, 0, 119, 120) == before
@@ -0,0 +1,133 @@
+"""The batched frame classification and the worker ranges against frame by frame references"""
+
+import numpy as np
+import pytest
+
+import engine
+
+# detection points on a 16x16 frame, the valid pause row is checked on rows 11 to 13
+DETECTION_POINTS = (
+    # acc_r, acc_l, p_m, p_l
+    [[2, 2], [2, 4], [2, 6], [2, 8]],
+    # m_p_l, m_p_m_2, m_p_m, m_p_r, then the valid pause row
+    [[6, 2], [6, 4], [6, 6], [6, 8], [12, 2], [12, 5], [12, 8], [12, 11]],
+)
+# pixel values around every threshold of the classification
+EDGE_VALUES = np.array([0, 54, 55, 56, 100, 127, 128, 129, 130, 131, 199, 200, 201, 239, 240, 241, 255])
+
+
+def is_pause(frame, pc):
+    """The original per-pixel check, on int frames where it wrapped around on uint8 differences"""
+    if abs(
+            float(sum(frame[pc.p_l_y, pc.p_l_x]) / len(frame[pc.p_l_y, pc.p_l_x]))
+            - float(sum(frame[pc.p_m_y, pc.p_m_x]) / len(frame[pc.p_m_y, pc.p_m_x]))
+            ) < engine.P_DIFF_TH:
+        return True
+    white_points = [(pc.m_p_l_y, pc.m_p_l_x), (pc.m_p_m_y, pc.m_p_m_x), (pc.m_p_r_y, pc.m_p_r_x)]
+    if all(all(frame[y, x] > engine.WHITE_10) for y, x in white_points):
+        return True
+    if (
+        all(frame[pc.m_p_m_y, pc.m_p_m_x] > engine.GRAY)
+        and all(abs(frame[pc.m_p_m_y, pc.m_p_m_x] - frame[pc.m_p_l_y, pc.m_p_l_x]) < engine.M_P_DIFF_TH)
+        and all(abs(frame[pc.m_p_m_y, pc.m_p_m_x] - frame[pc.m_p_r_y, pc.m_p_r_x]) < engine.M_P_DIFF_TH)
+        and all(abs(frame[pc.m_p_l_y, pc.m_p_l_x] - frame[pc.m_p_r_y, pc.m_p_r_x]) < engine.M_P_DIFF_TH)
+        and all(frame[pc.m_p_m_y_2, pc.m_p_m_x_2] < engine.GRAY)
+    ):
+        return True
+    return False
+
+
+def is_acceleration(frame, pc):
+    if all(frame[pc.acc_r_y, pc.acc_r_x] > engine.WHITE_9) and any(frame[pc.acc_l_y, pc.acc_l_x] < engine.WHITE_9):
+        return False
+    return True
+
+
+def is_valid_pause(frame, pc):
+    for dy in engine.VP_ROW_OFFSETS:
+        row = pc.vp_y + dy
+        if all(
+            all(engine.GRAY_LOWER <= frame[row, x]) and all(frame[row, x] <= engine.GRAY_UPPER)
+            for x in (pc.vp_x_1, pc.vp_x_2, pc.vp_x_3, pc.vp_x_4)
+        ):
+            return True
+    return False
+
+
+def random_frames(frame_cnt, pc, rng):
+    """
+    Frames of threshold values, with the pixels of each comparison often close to
+    each other so that every rule of the classification decides some frames
+    """
+    frames = rng.choice(EDGE_VALUES, size=(frame_cnt, 16, 16, 3)).astype(np.uint8)
+    for frame in frames:
+        if rng.random() < 0.3:
+            frame[pc.p_l_y, pc.p_l_x] = np.clip(
+                frame[pc.p_m_y, pc.p_m_x].astype(int) + rng.integers(-12, 13, 3), 0, 255
+            )
+        if rng.random() < 0.5:
+            for y, x in ((pc.m_p_l_y, pc.m_p_l_x), (pc.m_p_r_y, pc.m_p_r_x)):
+                frame[y, x] = np.clip(frame[pc.m_p_m_y, pc.m_p_m_x].astype(int) + rng.integers(-32, 33, 3), 0, 255)
+        elif rng.random() < 0.3:
+            for y, x in ((pc.m_p_l_y, pc.m_p_l_x), (pc.m_p_m_y, pc.m_p_m_x), (pc.m_p_r_y, pc.m_p_r_x)):
+                frame[y, x] = rng.choice([240, 241, 255], size=3)
+        if rng.random() < 0.5:
+            row = pc.vp_y + rng.choice(engine.VP_ROW_OFFSETS)
+            frame[row, [pc.vp_x_1, pc.vp_x_2, pc.vp_x_3, pc.vp_x_4]] = rng.choice(EDGE_VALUES[1:10], size=(4, 3))
+    return frames
+
+
+def test_classify_probes_matches_the_per_pixel_checks():
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(16, 16, 0, 0, 0, 0, DETECTION_POINTS)
+    frames = random_frames(4000, pc, np.random.default_rng(0))
+    pause, valid_pause, acceleration = engine.classify_frames(frames, engine.get_probe_points(pc))
+    expected_pause = np.array([is_pause(frame.astype(int), pc) for frame in frames])
+    expected_valid_pause = expected_pause & np.array([is_valid_pause(frame.astype(int), pc) for frame in frames])
+    np.testing.assert_array_equal(pause, expected_pause)
+    np.testing.assert_array_equal(valid_pause, expected_valid_pause)
+    np.testing.assert_array_equal(acceleration, [is_acceleration(frame.astype(int), pc) for frame in frames])
+    # every outcome occurs, including pauses found by each of the three rules alone
+    for flags in (pause, valid_pause, acceleration):
+        assert np.any(flags) and not np.all(flags)
+    probes = engine.gather_probes(frames, engine.get_probe_points(pc)).astype(int)
+    icon = np.abs(probes[:, engine.PROBE_P_L].mean(axis=1) - probes[:, engine.PROBE_P_M].mean(axis=1)) < engine.P_DIFF_TH
+    white = np.all(probes[:, engine.PROBE_M_P_L:engine.PROBE_M_P_R + 1] > engine.WHITE_10, axis=(1, 2))
+    assert np.any(icon & ~white) and np.any(white & ~icon) and np.any(pause & ~icon & ~white)
+
+
+def test_classify_frames_takes_one_frame_or_a_stack():
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(16, 16, 0, 0, 0, 0, DETECTION_POINTS)
+    frames = random_frames(50, pc, np.random.default_rng(1))
+    probe_points = engine.get_probe_points(pc)
+    batch = engine.classify_frames(frames, probe_points)
+    for k, frame in enumerate(frames):
+        assert [flags[0] for flags in engine.classify_frames(frame, probe_points)] == [flags[k] for flags in batch]
+
+
+@pytest.mark.parametrize("with_keyframes", [False, True])
+def test_partition_frames_covers_every_frame_once(with_keyframes):
+    rng = np.random.default_rng(2)
+    for _ in range(2000):
+        first = int(rng.integers(0, 1000))
+        last = first + int(rng.integers(-2, 3000))
+        parts = int(rng.integers(1, 40))
+        keyframes = np.sort(rng.choice(4000, size=int(rng.integers(1, 60)), replace=False)) if with_keyframes else None
+        ranges = engine.partition_frames(first, last, parts, keyframes)
+        if last < first:
+            assert ranges == []
+            continue
+        assert 1 <= len(ranges) <= parts
+        assert ranges[0][0] == first and ranges[-1][1] == last
+        assert all(start <= end for start, end in ranges)
+        assert all(prev[1] + 1 == cur[0] for prev, cur in zip(ranges, ranges[1:]))
+        if keyframes is None:
+            lengths = [end - start + 1 for start, end in ranges]
+            assert max(lengths) - min(lengths) <= 1
+
+
+def test_partition_frames_moves_boundaries_to_nearby_keyframes():
+    # balanced boundaries at 250, 500, 750; keyframes near the first two only
+    ranges = engine.partition_frames(0, 999, 4, np.array([0, 240, 490, 600]))
+    assert [start for start, _ in ranges] == [0, 240, 490, 750]
@@ -0,0 +1,31 @@
+"""The command line entry point reports the progress of every pipeline stage as JSON events"""
+
+import json
+import os
+import subprocess
+import sys
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+
+
+def test_process_reports_the_progress_of_the_analysis_workers(make_video, tmp_path):
+    # the default analysis backend runs spawned worker processes, which log through the parent
+    video_path = make_video(300, "30")  # an integer frame rate, no "warning" event
+    result = subprocess.run(
+        [
+            sys.executable, CLI_PATH, "process", "--mode", "lazy-keep-valid", "--input", video_path,
+            "--out", str(tmp_path / "out"), "--workers", "2", "--end", "5",
+        ],
+        cwd=tmp_path,  # a fresh analysis cache, so the analysis runs
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert result.returncode == 0, result.stderr
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [events[0]["event"], events[-1]["event"]] == ["start", "done"]
+    analyze = [event for event in events if event["event"] == "progress" and event["stage"] == "analyze"]
+    assert {event["worker"] for event in analyze} == {0, 1}
+    for worker in (0, 1):
+        fractions = [event["fraction"] for event in analyze if event["worker"] == worker]
+        assert fractions[0] == 0.0 and fractions[-1] == 1.0
@@ -0,0 +1,73 @@
+"""Jobs are checked against the exact frame rate and fail when an output cannot be written"""
+
+import os
+
+import pytest
+
+import engine
+
+
+@pytest.mark.parametrize("end_second, error", [(29, None), (30, None), (31, "end_exceeds_video")])
+def test_get_job_error_measures_the_video_at_the_exact_rate(make_video, tmp_path, end_second, error):
+    video_path = make_video(900)  # 30.03 seconds at 30000/1001
+    job = engine.JobConfig(video_path, str(tmp_path), 2, 0, end_second)
+    assert engine.get_job_error(job) == error
+
+
+
+def test_missing_segment_files_are_failures(tmp_path):
+    failures = []
+    segments = [(0, 0, 10, ""), (1, 10, 20, "_x")]
+    (tmp_path / (engine.TEMP_PREFIX + "0.mp4")).write_bytes(b"")  # no audio beside it
+    jobs = engine.get_mux_jobs(str(tmp_path) + os.sep, 10, segments, True, 1, ".m4a", failures)
+    assert jobs == []
+    assert failures == ["10.mp4", "11_x.mp4"]
+
+
+def test_failed_merges_fail_the_job(make_video, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", "thread")
+    monkeypatch.setattr(engine, "mux_command", lambda jobs, audio_codec: ["ffmpeg", "-no-such-option"])
+    with pytest.raises(RuntimeError):
+        engine.run_job(engine.JobConfig(make_video(900), str(tmp_path), 1, 2, 20, thread_num=2))
+    # nothing half merged is left behind
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(engine.TEMP_PREFIX)]
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+def test_failed_audio_cuts_fail_the_job(make_video, tmp_path, monkeypatch, pipelined):
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", "thread")
+    monkeypatch.setattr(engine, "NORMAL_PIPELINE", pipelined)
+    call = engine.subprocess.call
+
+    def fail_first_audio(cmd):
+        # the first audio cut is written in full, but ffmpeg exits with an error
+        code = call(cmd)
+        return 1 if cmd[-1].endswith(engine.TEMP_PREFIX + "0.m4a") else code
+
+    monkeypatch.setattr(engine.subprocess, "call", fail_first_audio)
+    # the first segment, prefix + 0, is the only failure
+    with pytest.raises(RuntimeError, match=r"\b10+\.mp4$"):
+        engine.run_job(engine.JobConfig(make_video(900), str(tmp_path), 1, 2, 20, thread_num=2))
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(engine.TEMP_PREFIX)]
+
+
+@pytest.mark.parametrize("lazy_render, streaming", [("filter", False), ("frames", False), ("filter", True)])
+@pytest.mark.parametrize("exit_code", [1, 0])
+def test_failed_lazy_render_fails_the_job(make_video, tmp_path, monkeypatch, lazy_render, streaming, exit_code):
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", "thread")
+    monkeypatch.setattr(engine, "LAZY_RENDER", lazy_render)
+    monkeypatch.setattr(engine, "LAZY_STREAMING", streaming)
+    call = engine.subprocess.call
+
+    def fail_output(cmd):
+        # the final render or concat never writes output.mp4, some builds even exit with 0
+        return exit_code if cmd[-1].endswith("output.mp4") else call(cmd)
+
+    monkeypatch.setattr(engine.subprocess, "call", fail_output)
+    with pytest.raises(RuntimeError, match="output.mp4"):
+        engine.run_job(engine.JobConfig(make_video(900), str(tmp_path), 2, 2, 20, thread_num=2))
+    assert not (tmp_path / "output.mp4").exists()
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(engine.TEMP_PREFIX)]
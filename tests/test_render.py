@@ -0,0 +1,338 @@
+"""The renders return exactly the frames asked for, at integer and NTSC frame rates"""
+
+import os
+import subprocess
+import threading
+from fractions import Fraction
+
+import cv2
+import numpy as np
+import pytest
+
+import engine
+from conftest import index_detection_points, read_index
+
+# inside one GOP, across whole GOPs, from the first frame, to the last frame
+RENDER_RANGES = ((50, 60), (10, 130), (300, 420), (0, 48), (845, 900))
+
+
+def read_indices(video_path):
+    cap = cv2.VideoCapture(video_path)
+    indices = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        indices.append(read_index(frame))
+    cap.release()
+    return indices
+
+
+def read_packet_hashes(video_path):
+    """MD5 of every video packet, in decode order"""
+    output = subprocess.check_output([
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=data_hash",
+        "-show_data_hash", "md5", "-of", "csv=p=0", video_path,
+    ])
+    return output.decode().split()
+
+
+def ffmpeg_reads_mpegts(tmp_path):
+    """Whether this ffmpeg build reads back the MPEG-TS parts of the smart render"""
+    path = str(tmp_path / "probe.ts")
+    subprocess.call(["ffmpeg", "-loglevel", "quiet", "-y", "-f", "lavfi", "-i", "testsrc=d=0.2", "-c:v", "libx264", path])
+    return subprocess.call(["ffmpeg", "-loglevel", "quiet", "-i", path, "-f", "null", "-"]) == 0
+
+
+@pytest.mark.parametrize("rate", ["30000/1001", "30"])
+@pytest.mark.parametrize("start, end", RENDER_RANGES)
+def test_smart_render_range_is_frame_exact(make_video, tmp_path, monkeypatch, rate, start, end):
+    video_path = make_video(900, rate)
+    frame_rate = engine.get_frame_rate(video_path)
+    codec = engine.get_video_codec(video_path)
+    keyframes = engine.get_keyframes(video_path, frame_rate)
+    inner = keyframes[(keyframes >= start) & (keyframes <= end)]
+    if len(inner) >= 2 and not ffmpeg_reads_mpegts(tmp_path):
+        pytest.skip("this ffmpeg cannot read MPEG-TS")
+    copies = []
+    smart_copy_range = engine.smart_copy_range
+
+    def record_copy(*args):
+        copies.append(smart_copy_range(*args))
+        return copies[-1]
+
+    monkeypatch.setattr(engine, "smart_copy_range", record_copy)
+    out_path = str(tmp_path / "out.mp4")
+    assert engine.smart_render_range(video_path, start, end, out_path, keyframes, frame_rate, codec)
+    assert read_indices(out_path) == list(range(start, end))
+    # the re-encoded frames keep the profile, level and time base of the source
+    assert engine.get_video_codec(out_path) == codec
+    # ranges with a whole GOP are written by the stream copy, not the full re-encode fallback,
+    # and their whole GOPs are the packets of the source (the keyframes may gain in-band headers)
+    assert copies == ([True] if len(inner) >= 2 else [])
+    if copies:
+        out_hashes, source_hashes = read_packet_hashes(out_path), read_packet_hashes(video_path)
+        copied = [k for k in range(int(inner[0]), int(inner[-1])) if k not in inner]
+        assert [out_hashes[k - start] for k in copied] == [source_hashes[k] for k in copied]
+
+
+def test_smart_render_range_reencodes_when_a_step_fails(make_video, tmp_path, monkeypatch):
+    video_path = make_video(900)
+    frame_rate = engine.get_frame_rate(video_path)
+    call = subprocess.call
+
+    def fail_concat(cmd):
+        return 1 if "concat" in cmd else call(cmd)
+
+    monkeypatch.setattr(engine.subprocess, "call", fail_concat)
+    out_path = str(tmp_path / "out.mp4")
+    assert engine.smart_render_range(
+        video_path, 10, 130, out_path, engine.get_keyframes(video_path, frame_rate), frame_rate,
+        engine.get_video_codec(video_path)
+    )
+    assert read_indices(out_path) == list(range(10, 130))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["out.mp4"]
+
+
+def lazy_kept_frames(frame_cnt):
+    """Kept frames of a lazy render: whole runs, cut pauses and 1x speed runs keeping every second frame"""
+    kept = np.full(frame_cnt, False)
+    kept[0:100] = True
+    kept[100:200:2] = True
+    kept[260:451] = True
+    kept[451:700:2] = True
+    kept[703:709] = True
+    kept[820:] = True
+    return kept
+
+
+def get_stream_duration(video_path, stream):
+    output = subprocess.run(
+        ["ffprobe", "-v", "quiet", "-select_streams", stream, "-show_entries", "stream=duration", "-of", "csv=p=0",
+         video_path],
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output)
+
+
+def test_audio_chunk_runs_stay_in_sync():
+    kept = np.full(20000, False)
+    rng = np.random.default_rng(0)
+    pos = 0
+    while pos < len(kept):
+        length, step = int(rng.integers(1, 60)), int(rng.integers(1, 3))
+        kept[pos:pos + length:step] = True
+        pos += length + int(rng.integers(0, 30))
+    runs = engine.get_lazy_runs(kept)
+    chunks_per_frame = Fraction(48000) / Fraction(30000, 1001) / 1602
+    chunk_runs = engine.get_audio_chunk_runs(runs, chunks_per_frame)
+    chunk_cnt = 0
+    for (first, last, step), (chunk_first, chunk_last, chunk_step) in zip(runs, chunk_runs):
+        assert chunk_step == step
+        # every chunk run starts at its frames and the kept audio stays within a chunk of the kept video
+        assert abs(chunk_first - first * chunks_per_frame) <= 1
+        chunk_cnt += (chunk_last - chunk_first) // step + 1
+        assert abs(chunk_cnt - np.count_nonzero(kept[:last + 1]) * chunks_per_frame) <= 1
+    assert all(prev[1] < run[0] for prev, run in zip(chunk_runs, chunk_runs[1:]))
+
+
+@pytest.mark.parametrize("rate", ["30000/1001", "30"])
+def test_filter_lazy_render_keeps_the_frames_and_their_audio(make_video, tmp_path, rate):
+    video_path = make_video(900, rate)
+    kept = lazy_kept_frames(900)
+    engine.filter_lazy_render(video_path, str(tmp_path) + os.sep, kept, engine.get_frame_rate(video_path))
+    out_path = str(tmp_path / "output.mp4")
+    assert read_indices(out_path) == list(np.flatnonzero(kept))
+    frame_time = 1 / float(Fraction(rate))
+    assert abs(get_stream_duration(out_path, "a:0") - get_stream_duration(out_path, "v:0")) < frame_time
+
+
+def test_encoder_video_generate_renames_only_the_segments_written(make_video, tmp_path):
+    video_path = make_video(120)
+    working_path = str(tmp_path) + os.sep
+    # the reader runs out of frames in the third segment, as with a too high container frame count
+    segments = [(0, 0, 50, ""), (1, 50, 100, "_x"), (2, 100, 150, ""), (3, 150, 170, "")]
+    cap = engine.FrameSource(cv2.VideoCapture(video_path), engine.get_keyframes(video_path, Fraction(30000, 1001)))
+    closed = []
+    engine.encoder_video_generate(0, working_path, segments, cap, Fraction(30000, 1001), 320, 240, closed.append)
+    assert closed == [0, 1, 2, 3]
+    names = [engine.TEMP_PREFIX + name for name in ("0.mp4", "1_x.mp4", "2.mp4")]
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(names)
+    assert read_indices(str(tmp_path / names[1])) == list(range(50, 100))
+    assert read_indices(str(tmp_path / names[2])) == list(range(100, 120))
+
+
+class LabelCapture:
+    """cv2.VideoCapture stand-in whose frames carry their index and their pause, valid pause and 1x speed labels"""
+
+    def __init__(self, pause, vp, acc):
+        self.labels = np.stack([pause, vp, acc], axis=1).astype(np.uint8)
+        self.pos = 0
+
+    def read(self):
+        if self.pos >= len(self.labels):
+            return False, None
+        frame = np.zeros((1, 5, 3), dtype=np.uint8)
+        frame[0, :3, 0] = self.labels[self.pos]
+        frame[0, 3:, 0] = divmod(self.pos, 256)
+        self.pos += 1
+        return True, frame
+
+    def set(self, prop, value):
+        self.pos = int(value)
+
+    def release(self):
+        pass
+
+
+class FrameList:
+    def __init__(self):
+        self.indices = []
+
+    def write(self, frame):
+        self.indices.append(int(frame[0, 3, 0]) * 256 + int(frame[0, 4, 0]))
+
+    def release(self):
+        pass
+
+
+def random_labels(frame_cnt, rng):
+    """Runs of pauses holding valid pause runs of any length, 1x and 2x speed runs"""
+    pause = np.full(frame_cnt, False)
+    vp = np.full(frame_cnt, False)
+    acc = np.full(frame_cnt, False)
+    pos = 0
+    in_pause = bool(rng.integers(0, 2))
+    while pos < frame_cnt:
+        end = min(frame_cnt, pos + int(rng.integers(1, 15)))
+        if in_pause:
+            pause[pos:end] = True
+            for _ in range(int(rng.integers(0, 3))):
+                vp_start = int(rng.integers(pos, end))
+                vp[vp_start:vp_start + int(rng.integers(1, 4))] = True
+            vp[end:] = False
+        else:
+            acc[pos:end] = bool(rng.integers(0, 2))
+        in_pause = not in_pause
+        pos = end
+    return pause, vp, acc
+
+
+@pytest.mark.parametrize("mode", [2, 3])
+def test_lazy_stream_generate_writes_the_frames_of_the_two_pass_render(monkeypatch, mode):
+    monkeypatch.setattr(
+        engine, "classify_probes", lambda probes: (probes[:, 0, 0] > 0, probes[:, 1, 0] > 0, probes[:, 2, 0] > 0)
+    )
+    probe_points = (np.zeros(3, dtype=np.intp), np.arange(3))
+    rng = np.random.default_rng(mode)
+    for _ in range(300):
+        frame_cnt = int(rng.integers(1, 200))
+        pause, vp, acc = random_labels(frame_cnt, rng)
+        # half of the windows start at the first or end at the last frame, which expand_valid_pauses treats apart
+        start_f = int(rng.integers(0, frame_cnt)) if rng.random() < 0.5 else 0
+        end_f = int(rng.integers(start_f, frame_cnt)) if rng.random() < 0.5 else frame_cnt - 1
+        # the flags and frames of the two-pass pipeline
+        window = np.arange(frame_cnt)
+        window = (start_f <= window) & (window <= end_f)
+        expected_flags = [pause & window, vp & window, ~window | (~pause & acc)]
+        expected_flags[2][engine.lazy_decimate(np.flatnonzero(window & ~pause & ~acc))] = True
+        timeline = engine.PauseTimeline.from_flags(*expected_flags)
+        kept = timeline.flags(engine.KEEP_BIT)
+        if mode == 2:
+            kept |= timeline.expand_valid_pauses().flags(engine.VALID_PAUSE_BIT)
+
+        flags = [np.full(frame_cnt, False) for _ in range(3)]
+        flags[2][:start_f] = flags[2][end_f + 1:] = True
+        ranges = engine.partition_frames(0, frame_cnt - 1, int(rng.integers(1, 6)))
+        writers = [FrameList() for _ in ranges]
+        opened = iter(writers)
+        monkeypatch.setattr(engine, "open_frame_writer", lambda *args: next(opened))
+        written_cnts = [0] * len(ranges)
+        for worker_idx, (start, end) in enumerate(ranges):
+            engine.lazy_stream_generate(
+                worker_idx, "", start_f, end_f, start, end, LabelCapture(pause, vp, acc), probe_points, *flags,
+                mode == 2, frame_cnt, threading.Event(), written_cnts, Fraction(30), 5, 1
+            )
+        for expected, actual in zip(expected_flags, flags):
+            np.testing.assert_array_equal(actual, expected)
+        assert sum((writer.indices for writer in writers), []) == list(np.flatnonzero(kept))
+        assert written_cnts == [len(writer.indices) for writer in writers]
+
+
+def test_lazy_stream_generate_aborts_on_a_long_undecided_pause(monkeypatch):
+    monkeypatch.setattr(
+        engine, "classify_probes", lambda probes: (probes[:, 0, 0] > 0, probes[:, 1, 0] > 0, probes[:, 2, 0] > 0)
+    )
+    monkeypatch.setattr(engine, "open_frame_writer", lambda *args: FrameList())
+    pause = np.zeros(100, dtype=bool)
+    pause[20:60] = True
+    flags = [np.full(100, False) for _ in range(3)]
+    abort = threading.Event()
+    engine.lazy_stream_generate(
+        0, "", 0, 99, 0, 99, LabelCapture(pause, np.zeros(100), np.ones(100)), (np.zeros(3, dtype=np.intp), np.arange(3)),
+        *flags, True, 30, abort, [0], Fraction(30), 5, 1
+    )
+    assert abort.is_set()
+
+
+@pytest.mark.parametrize("mode", [2, 3])
+@pytest.mark.parametrize("thread_num", [1, 3])
+def test_streamed_lazy_job_matches_the_two_pass_job(make_video, tmp_path, monkeypatch, mode, thread_num):
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", "thread")
+    video_path = make_video(900)
+    job = engine.JobConfig(video_path, "", mode, 3, 25, thread_num=thread_num, detection_points=index_detection_points())
+    outputs = {}
+    for streaming in (False, True):
+        monkeypatch.setattr(engine, "LAZY_STREAMING", streaming)
+        working_path = tmp_path / str(streaming)
+        working_path.mkdir()
+        engine.run_job(job._replace(working_path=str(working_path)))
+        outputs[streaming] = str(working_path / "output.mp4")
+        assert sorted(path.name for path in working_path.iterdir()) == ["output.mp4"]
+    indices = read_indices(outputs[True])
+    assert indices == read_indices(outputs[False])
+    assert 0 < len(indices) < 900
+    frame_time = 1001 / 30000
+    assert abs(get_stream_duration(outputs[True], "a:0") - get_stream_duration(outputs[True], "v:0")) < frame_time
+    assert abs(get_stream_duration(outputs[True], "a:0") - get_stream_duration(outputs[False], "a:0")) < frame_time
+
+
+def test_streamed_lazy_job_falls_back_to_two_passes(make_video, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", "thread")
+    monkeypatch.setattr(engine, "LAZY_STREAMING", True)
+    monkeypatch.setattr(engine, "LAZY_STREAM_MAX_PENDING_MB", 0)  # one pending frame at most
+    video_path = make_video(900)
+    engine.run_job(engine.JobConfig(video_path, str(tmp_path), 3, 3, 25, detection_points=index_detection_points()))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["output.mp4"]
+
+
+@pytest.mark.parametrize("mode", [0, 1])
+def test_normal_audio_bounds_do_not_depend_on_the_pipeline_or_the_workers(make_video, tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(engine, "ANALYSIS_CACHE", False)
+    monkeypatch.setattr(engine, "ANALYSIS_BACKEND", "thread")
+    video_path = make_video(300)
+    extract_audio_segment = engine.extract_audio_segment
+    bounds = {}
+
+    def record_bounds(video_path, seg_start, seg_end, frame_rate, audio_codec, out_path):
+        bounds[key].append((os.path.basename(out_path), seg_start, seg_end))
+        return extract_audio_segment(video_path, seg_start, seg_end, frame_rate, audio_codec, out_path)
+
+    monkeypatch.setattr(engine, "extract_audio_segment", record_bounds)
+    for key in ((True, 1), (True, 3), (False, 1), (False, 3)):
+        pipelined, thread_num = key
+        monkeypatch.setattr(engine, "NORMAL_PIPELINE", pipelined)
+        bounds[key] = []
+        working_path = tmp_path / "_".join(map(str, key))
+        working_path.mkdir()
+        engine.run_job(engine.JobConfig(
+            video_path, str(working_path), mode, 0, 9, thread_num=thread_num, detection_points=index_detection_points()
+        ))
+    expected = sorted(bounds[True, 1])
+    assert len(expected) > 3 and expected[-1][2] == 299  # only the last segment ends one frame early
+    for key in bounds:
+        assert sorted(bounds[key]) == expected, key
+
@@ -0,0 +1,52 @@
+"""Frame accurate seeking of the analysis readers, at integer and NTSC frame rates"""
+
+from fractions import Fraction
+
+import cv2
+import pytest
+
+import engine
+from conftest import index_probe_points, read_index
+
+SEEK_TARGETS = (1, 47, 48, 100, 300, 599, 850)
+
+
+@pytest.mark.parametrize("rate", ["30000/1001", "60000/1001", "30"])
+def test_get_frame_rate_is_exact(make_video, rate):
+    video_path = make_video(60, rate)
+    assert engine.get_frame_rate(video_path) == Fraction(rate)
+
+
+@pytest.mark.parametrize("rate", ["30000/1001", "30"])
+def test_probe_strip_reader_seeks_to_the_frame(make_video, rate):
+    video_path = make_video(900, rate)
+    fps, lgt, hgt, frame_cnt = engine.get_video_info(video_path)
+    probe_points = index_probe_points()
+    reader = engine.ProbeStripReader(video_path, engine.get_frame_rate(video_path), lgt, hgt, probe_points)
+    strip_points = engine.get_strip_probe_points(probe_points, reader.tiles)
+    for target in SEEK_TARGETS:
+        reader.set(cv2.CAP_PROP_POS_FRAMES, target)
+        ret, strip = reader.read()
+        assert ret
+        assert read_index(strip, strip_points) == target
+        # reading on continues frame by frame
+        ret, strip = reader.read()
+        assert read_index(strip, strip_points) == target + 1
+    reader.release()
+
+
+@pytest.mark.parametrize("input_kind", ["strip", "capture"])
+def test_analysis_source_reads_every_frame_from_any_start(make_video, monkeypatch, input_kind):
+    video_path = make_video(900)
+    monkeypatch.setattr(engine, "ANALYSIS_INPUT", input_kind)
+    fps, lgt, hgt, frame_cnt = engine.get_video_info(video_path)
+    pc = engine.PointCoordinates()
+    pc.calculate_or_use_coordinates(lgt, hgt, 0, 0, 0, 0)
+    monkeypatch.setattr(engine, "get_probe_points", lambda pc: index_probe_points())
+    cap, probe_points = engine.open_analysis_source(video_path, pc, engine.get_frame_rate(video_path), lgt, hgt)
+    for start in (0, 310, 777):
+        cap.advance_to(start)
+        for k in range(start, start + 5):
+            ret, frame = cap.read()
+            assert read_index(frame, probe_points) == k
+    cap.release()
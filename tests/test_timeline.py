@@ -0,0 +1,122 @@
+"""PauseTimeline post-processing against the frame by frame loops it replaced"""
+
+import numpy as np
+import pytest
+
+import engine
+
+
+def expand_valid_pause_range(frame_cnt, pause_y_n, vp_y_n):
+    """The original loop, with its bounds checked before indexing (it wrapped around at frame 0)"""
+    for i in range(1, frame_cnt - 1):
+        if vp_y_n[i] == True and vp_y_n[i - 1] == False and pause_y_n[i - 1] == True:
+            a = i - 1
+            while a >= 0 and pause_y_n[a] == True:
+                vp_y_n[a] = True
+                a -= 1
+        elif vp_y_n[i] == True and vp_y_n[i + 1] == False and pause_y_n[i + 1] == True:
+            a = i + 1
+            while a < frame_cnt and pause_y_n[a] == True:
+                vp_y_n[a] = True
+                a += 1
+
+
+def remove_ignore_frame_cnt_part(frame_cnt, keep_frame_y_n, vp_y_n, ignore_frame_cnt):
+    """The original loop"""
+    a = 0
+    start = 0
+    flag = 0
+    # flag 0 means keep frame_y_n = True, 1 means vp_y_n = True
+    for i in range(1, frame_cnt - 1):
+        if keep_frame_y_n[i] == True:
+            if flag == 0:
+                a += 1
+            else:
+                if a <= ignore_frame_cnt:
+                    for j in range(start, i - 1):
+                        vp_y_n[j] = False
+                a = 0
+                start = i
+                flag = 0
+        elif vp_y_n[i] == True:
+            if flag == 1:
+                a += 1
+            else:
+                if a <= ignore_frame_cnt:
+                    for j in range(start, i - 1):
+                        keep_frame_y_n[j] = False
+                a = 0
+                start = i
+                flag = 1
+
+
+def random_flags(frame_cnt, rng):
+    """
+    Pause, valid pause and keep flags shaped like an analysis result: runs of a few frames,
+    valid pauses only inside pauses, kept frames only outside them, 1x speed runs keeping
+    every second frame
+    """
+    pause_y_n = np.full(frame_cnt, False)
+    vp_y_n = np.full(frame_cnt, False)
+    keep_frame_y_n = np.full(frame_cnt, False)
+    pos = 0
+    pause = bool(rng.integers(0, 2))
+    while pos < frame_cnt:
+        end = min(frame_cnt, pos + int(rng.integers(1, 12)))
+        if pause:
+            pause_y_n[pos:end] = True
+            if rng.random() < 0.5:
+                vp_start = int(rng.integers(pos, end))
+                vp_y_n[vp_start:int(rng.integers(vp_start, end)) + 1] = True
+        else:
+            keep_frame_y_n[pos:end:int(rng.integers(1, 3))] = True
+        pause = not pause
+        pos = end
+    return pause_y_n, vp_y_n, keep_frame_y_n
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_expand_valid_pauses_matches_the_loop(seed):
+    rng = np.random.default_rng(seed)
+    for frame_cnt in rng.integers(1, 400, 300):
+        pause_y_n, vp_y_n, keep_frame_y_n = random_flags(frame_cnt, rng)
+        timeline = engine.PauseTimeline.from_flags(pause_y_n, vp_y_n, keep_frame_y_n).expand_valid_pauses()
+        expand_valid_pause_range(frame_cnt, pause_y_n, vp_y_n)
+        np.testing.assert_array_equal(timeline.flags(engine.VALID_PAUSE_BIT), vp_y_n)
+        np.testing.assert_array_equal(timeline.flags(engine.PAUSE_BIT), pause_y_n)
+        np.testing.assert_array_equal(timeline.flags(engine.KEEP_BIT), keep_frame_y_n)
+
+
+@pytest.mark.parametrize("ignore_frame_cnt", [1, 3, 8])
+def test_remove_short_runs_matches_the_loop(ignore_frame_cnt):
+    rng = np.random.default_rng(ignore_frame_cnt)
+    for frame_cnt in rng.integers(1, 400, 300):
+        pause_y_n, vp_y_n, keep_frame_y_n = random_flags(frame_cnt, rng)
+        timeline = engine.PauseTimeline.from_flags(pause_y_n, vp_y_n, keep_frame_y_n).expand_valid_pauses()
+        expand_valid_pause_range(frame_cnt, pause_y_n, vp_y_n)
+
+        # lazy mode keeping valid pauses
+        kept = timeline.remove_short_runs(ignore_frame_cnt)
+        expected_keep, expected_vp = keep_frame_y_n.copy(), vp_y_n.copy()
+        remove_ignore_frame_cnt_part(frame_cnt, expected_keep, expected_vp, ignore_frame_cnt)
+        np.testing.assert_array_equal(kept.flags(engine.KEEP_BIT), expected_keep)
+        np.testing.assert_array_equal(kept.flags(engine.VALID_PAUSE_BIT), expected_vp)
+
+        # lazy mode cutting all pauses, short kept runs are measured against every pause
+        cut = timeline.remove_short_runs(ignore_frame_cnt, engine.KEEP_BIT, engine.PAUSE_BIT)
+        expected_keep = keep_frame_y_n.copy()
+        remove_ignore_frame_cnt_part(frame_cnt, expected_keep, pause_y_n.copy(), ignore_frame_cnt)
+        np.testing.assert_array_equal(cut.flags(engine.KEEP_BIT), expected_keep)
+
+
+def test_segments_are_the_pause_runs():
+    rng = np.random.default_rng(9)
+    for frame_cnt in rng.integers(1, 400, 100):
+        pause_y_n, vp_y_n, keep_frame_y_n = random_flags(frame_cnt, rng)
+        segments = engine.PauseTimeline.from_flags(pause_y_n, vp_y_n).segments()
+        assert segments[0][1] == 0 and segments[-1][2] == frame_cnt
+        for idx, (index, start, end, suffix) in enumerate(segments):
+            assert index == idx
+            assert np.all(pause_y_n[start:end] == pause_y_n[start])
+            assert end == frame_cnt or pause_y_n[end] != pause_y_n[start]
+            assert suffix == engine.get_file_suffix(vp_y_n[start], pause_y_n[start])